@@ -1,11 +1,123 @@
+import gc
+import copy
+import atexit
+import io
 import os
 import re
+import sys
+import time
+import sqlite3
+import hmac
+import json
+import random
+import hashlib
+import cProfile
+import heapq
+import tempfile
+import threading
+import unicodedata
+import urllib.parse
+import multiprocessing
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing
+from itertools import islice
+try:
+    import fcntl
+except ImportError:  # Windows: sin lock entre procesos
+    fcntl = None
+import numpy as np
 import pandas as pd
-from flask import Flask, jsonify, request, render_template_string
-from functools import lru_cache
+import parseo
+from flask import Flask, Response, jsonify, request, render_template_string, g as flask_g
+from functools import lru_cache, wraps
+from bisect import bisect_left
 
 # === Ruta del Excel ===
 EXCEL_PATH = os.environ.get("EXCEL_PATH", "Monitoreo_de_candidatos_largo.xlsx")
+# Fuente alternativa (tiene prioridad): sqlite:///datos.db, dir://carpeta, o una ruta .xlsx/.db/carpeta
+DATA_SOURCE = os.environ.get("DATA_SOURCE", "").strip()
+# Procesos para leer y limpiar las hojas en paralelo ("auto" = núcleos); 0/1 = secuencial.
+# Solo aplica a la carga en el hilo principal (PRELOAD_SNAPSHOT); la perezosa es secuencial
+_PARSE_WORKERS_ENV = os.environ.get("PARSE_WORKERS", "0").strip().lower()
+PARSE_WORKERS = (os.cpu_count() or 1) if _PARSE_WORKERS_ENV == "auto" else int(_PARSE_WORKERS_ENV or "0")
+
+# Ingesta de semanas por API (desactivada si no hay token) y su store append-only
+INGEST_TOKEN    = os.environ.get("INGEST_TOKEN", "")
+INGEST_STORE    = os.environ.get("INGEST_STORE", "ingesta.jsonl")
+INGEST_MAX_ROWS = int(os.environ.get("INGEST_MAX_ROWS", "10000"))
+
+# Top de publicaciones: K máximo por (semana, espectro) precalculado al cargar el snapshot
+LEADERBOARD_K_MAX = int(os.environ.get("LEADERBOARD_K_MAX", "50"))
+
+# Diccionario de temas: JSON {"Tema": ["prefijo", ...]}; por defecto temas.json junto a app.py
+TEMAS_PATH = os.environ.get("TEMAS_PATH", "").strip() or os.path.join(os.path.dirname(os.path.abspath(__file__)), "temas.json")
+
+# Motor para heatmaps, ganadores y Δ: "pandas" (por defecto) o "sqlite" (SQLite embebido sobre un
+# archivo temporal por snapshot; mismas respuestas que pandas, ver _ConsultaSQL)
+QUERY_ENGINE = os.environ.get("QUERY_ENGINE", "pandas").strip().lower()
+
+# Memoria: columnas de texto con <= esta fracción de valores distintos se guardan como category
+CATEGORY_MAX_RATIO = float(os.environ.get("CATEGORY_MAX_RATIO", "0.5"))
+# Token para /api/admin/* (desactivado si está vacío)
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN", "")
+
+# Filas por bloque en /api/export (memoria constante al exportar)
+EXPORT_CHUNK_ROWS = int(os.environ.get("EXPORT_CHUNK_ROWS", "5000"))
+
+# Construye el snapshot al importar el módulo (para gunicorn --preload)
+PRELOAD_SNAPSHOT = os.environ.get("PRELOAD_SNAPSHOT", "").strip().lower() in {"1", "true", "yes", "on"}
+
+# === Warm-up al arrancar y cache de respuestas ===
+# Apagado por defecto: importar el módulo (tests, scripts, flask shell) no debe cargar nada en
+# segundo plano; el Procfile lo enciende para el servidor
+WARMUP            = os.environ.get("WARMUP", "").strip().lower() in {"1", "true", "yes", "on"}
+WARMUP_RESPONSES  = os.environ.get("WARMUP_RESPONSES", "").strip().lower() in {"1", "true", "yes", "on"}
+# Combinaciones de filtros frecuentes a precalentar, separadas por ';' (ej. "espectro=Centro;red=X")
+WARMUP_QUERIES    = [q.strip() for q in os.environ.get("WARMUP_QUERIES", "").split(";") if q.strip()]
+RESPONSE_CACHE_SIZE = int(os.environ.get("RESPONSE_CACHE_SIZE", "256"))  # 0 desactiva
+# Cache de respuestas en disco (SQLite) compartida por los workers y persistente entre reinicios.
+# Vacío la desactiva; ej. DISK_CACHE_PATH=cache/respuestas.sqlite
+DISK_CACHE_PATH   = os.environ.get("DISK_CACHE_PATH", "").strip()
+DISK_CACHE_MAX_MB = float(os.environ.get("DISK_CACHE_MAX_MB", "256"))
+
+# === Control de admisión (por proceso) ===
+# ADMISSION_SLOTS requests /api pesados a la vez y hasta ADMISSION_QUEUE esperando como mucho
+# ADMISSION_MAX_WAIT_MS. De los WEB_THREADS hilos del worker (--threads del Procfile), ADMISSION_RESERVED
+# quedan siempre para /health, /ready y cache hits: pesados (también en cola) y long-polls de
+# /api/version comparten el resto, y sin hueco reciben 503 / 'reintentar' sin ocupar hilo
+ADMISSION_ENABLED     = os.environ.get("ADMISSION_ENABLED", "1").strip().lower() in {"1", "true", "yes", "on"}
+WEB_THREADS           = int(os.environ.get("WEB_THREADS", "8"))
+ADMISSION_RESERVED    = int(os.environ.get("ADMISSION_RESERVED", "2"))
+ADMISSION_SLOTS       = int(os.environ.get("ADMISSION_SLOTS", "2"))
+ADMISSION_QUEUE       = int(os.environ.get("ADMISSION_QUEUE", "4"))
+ADMISSION_MAX_WAIT_MS = float(os.environ.get("ADMISSION_MAX_WAIT_MS", "3000"))
+ADMISSION_RETRY_S     = int(os.environ.get("ADMISSION_RETRY_S", "2"))
+# Límite por ruta, ej. "/api/variacion-semanal=1,/api/ganador-variacion=1" (por defecto ADMISSION_SLOTS)
+ADMISSION_ROUTES = {
+    k.strip(): int(v) for k, v in
+    (item.split("=", 1) for item in os.environ.get("ADMISSION_ROUTES", "").split(",") if "=" in item)
+}
+
+# Actualización en vivo: long-poll de /api/version. Solo LIVE_MAX_WAITERS hilos por proceso
+# quedan esperando; al resto se le pide reintentar en LIVE_RETRY_S segundos (la consulta sin
+# espera es barata y ya trae la versión nueva). Por defecto, la mitad de los hilos del carril
+# general que no usan los pesados: con --threads 8 -> 2 esperando y 4 para pesados (activos y en cola)
+LIVE_WAIT_S      = float(os.environ.get("LIVE_WAIT_S", "25"))
+LIVE_MAX_WAITERS = int(os.environ.get("LIVE_MAX_WAITERS") or
+                       max((WEB_THREADS - ADMISSION_RESERVED - ADMISSION_SLOTS) // 2, 1))
+LIVE_RETRY_S     = int(os.environ.get("LIVE_RETRY_S", "10"))
+
+# === Profiler bajo demanda (desactivado por defecto) ===
+PROFILE_ENABLED      = os.environ.get("PROFILE_ENABLED", "").strip().lower() in {"1", "true", "yes", "on"}
+PROFILE_THRESHOLD_MS = float(os.environ.get("PROFILE_THRESHOLD_MS", "1000"))
+PROFILE_SAMPLE_MS    = float(os.environ.get("PROFILE_SAMPLE_MS", "5"))
+PROFILE_SAMPLE_RATE  = float(os.environ.get("PROFILE_SAMPLE_RATE", "0.05"))  # fracción de requests muestreados
+PROFILE_DIR          = os.environ.get("PROFILE_DIR", "profiles")
+PROFILE_MAX_FILES    = int(os.environ.get("PROFILE_MAX_FILES", "50"))
+PROFILE_MAX_BYTES    = int(os.environ.get("PROFILE_MAX_BYTES", str(50 * 1024 * 1024)))
+PROFILE_SECRET       = os.environ.get("PROFILE_SECRET", "")  # firma HMAC para forzar cProfile por request
+PROFILE_TOKEN_TTL_S  = int(os.environ.get("PROFILE_TOKEN_TTL_S", "900"))  # vigencia de firmar_perfil()
 
 # === Columnas del Excel (hojas semanales) ===
 COL_ESPECTRO   = "Espectro"
@@ -29,6 +141,10 @@ PROM_COL_INTERSEM  = "Candidatos por promedio de interacciones a la semana"
 PROM_COL_LIKES     = "Likes promedio candidato"
 PROM_COL_COMENT    = "Comentarios promedio candidato"
 
+# === Diccionario de temas (COL_TEMA es texto libre de la publicación destacada) ===
+# Prefijos de palabra sin tildes ("ministr" cubre ministro/ministerio); varias palabras = todas presentes
+TEMA_OTROS = "Otros"  # filas con tema que no encaja en el diccionario
+
 # === Nombres visibles de semanas (mapeo hoja -> etiqueta canónica) ===
 WEEK_MAP = {
     "Semana 1": "7 Sep - 14 Sep",
@@ -51,6 +167,12 @@ WEEK_ORDER = list(WEEK_MAP.values())
 def _natural_key(s):
     return [int(t) if t.isdigit() else t.lower() for t in re.split(r'(\d+)', str(s))]
 
+def _sin_acentos(s):
+    """Clave de búsqueda: sin tildes, casefold y espacios simples ('Iván  Cepeda' -> 'ivan cepeda')."""
+    s = unicodedata.normalize("NFKD", str(s))
+    s = "".join(ch for ch in s if not unicodedata.combining(ch))
+    return " ".join(s.casefold().split())
+
 def _parse_multi(param_value: str):
     if not param_value:
         return []
@@ -76,35 +198,351 @@ def _r1(x):
     except Exception:
         return None
 
+# ---------- Ranking parcial / paginación ----------
+def _parse_int_arg(name):
+    try:
+        v = int((request.args.get(name) or "").strip())
+    except ValueError:
+        return None
+    return max(v, 0)
+
+def _parse_paging():
+    """
+    Lee top / limit / offset de la query. Devuelve (offset, limit) o None si
+    no se pidió paginación. 'top=N' equivale a offset=0&limit=N.
+    """
+    top, limit, offset = _parse_int_arg("top"), _parse_int_arg("limit"), _parse_int_arg("offset")
+    if top is None and limit is None and offset is None:
+        return None
+    if top is not None:
+        return 0, top
+    return (offset or 0), (limit if limit is not None else 2**31)
+
+def _rank_page(values, offset, limit):
+    """
+    Posiciones [offset, offset+limit) del ranking descendente de 'values'.
+    Usa partition (O(n)) y solo ordena los offset+limit primeros; NaN al final.
+    Empates por posición, igual en todas las páginas (las páginas se pueden unir).
+    """
+    v = np.asarray(values, dtype=float)
+    v = np.where(np.isnan(v), -np.inf, v)
+    n = v.size
+    end = min(offset + limit, n)
+    if offset >= end:
+        return np.array([], dtype=int)
+    if end < n:
+        corte = -np.partition(-v, end - 1)[end - 1]  # valor en la posición end-1 del ranking
+        head = np.flatnonzero(v >= corte)            # incluye todos los empatados con el corte
+    else:
+        head = np.arange(n)
+    head = head[np.argsort(-v[head], kind="stable")]
+    return head[offset:end]
+
+def _top_k(valores, ids, k):
+    """
+    Posiciones de los k mayores (desc; empate -> id menor) con partición O(n);
+    solo se ordenan los k elegidos. 'valores' sin NaN.
+    """
+    n = len(valores)
+    if k <= 0 or n == 0:
+        return np.array([], dtype=int)
+    if k >= n:
+        sel = np.arange(n)
+    else:
+        kth = np.partition(valores, n - k)[n - k]  # k-ésimo mayor
+        mayores = np.flatnonzero(valores > kth)
+        iguales = np.flatnonzero(valores == kth)
+        iguales = iguales[np.argsort(ids[iguales], kind="stable")][: k - len(mayores)]
+        sel = np.concatenate([mayores, iguales])
+    return sel[np.lexsort((ids[sel], -valores[sel]))]
+
+def _ranked(frame, col):
+    """Ranking descendente por 'col', recortado según top/limit/offset. Devuelve (frame, total)."""
+    paging = _parse_paging() or (0, len(frame))
+    return frame.iloc[_rank_page(frame[col].to_numpy(dtype=float), *paging)], len(frame)
+
+def _with_total(resp, total):
+    resp.headers["X-Total-Count"] = str(total)
+    return resp
+
+# ---------- Single-flight: una sola ejecución en curso por clave ----------
+class _Vuelo:
+    __slots__ = ("hecho", "valor", "error")
+
+    def __init__(self):
+        self.hecho = threading.Event()
+        self.valor = None
+        self.error = None
+
+_VUELOS = {}
+_VUELOS_LOCK = threading.Lock()
+
+def coalesce(key, fn):
+    """
+    Ejecuta fn() una vez por clave en curso: los hilos que llegan con la misma
+    clave mientras se calcula esperan y comparten el resultado (o una copia de la
+    excepción, ver _copia_error).
+    """
+    with _VUELOS_LOCK:
+        vuelo = _VUELOS.get(key)
+        lider = vuelo is None
+        if lider:
+            vuelo = _VUELOS[key] = _Vuelo()
+    if not lider:
+        vuelo.hecho.wait()
+        if vuelo.error is not None:
+            raise _copia_error(vuelo.error) from vuelo.error
+        return vuelo.valor
+    try:
+        vuelo.valor = fn()
+    except BaseException as e:
+        vuelo.error = e
+        raise
+    finally:
+        with _VUELOS_LOCK:
+            _VUELOS.pop(key, None)
+        vuelo.hecho.set()
+    return vuelo.valor
+
+def _copia_error(e):
+    """
+    Excepción propia para cada seguidor: relanzar el mismo objeto en varios hilos
+    le encadena los tracebacks de todos. Mismo tipo si se deja copiar.
+    """
+    try:
+        return copy.copy(e)
+    except Exception:
+        return RuntimeError(f"{type(e).__name__}: {e}")
+
+def single_flight(fn):
+    """
+    Para funciones con lru_cache: un miss concurrente se calcula una sola vez. El
+    último resultado se lee sin lock, así que un hit no toca _VUELOS_LOCK ni crea
+    un _Vuelo.
+    """
+    ultimo = [None]  # (args, valor)
+
+    @wraps(fn)
+    def wrapper(*args):
+        hit = ultimo[0]
+        if hit is not None and hit[0] == args:
+            return hit[1]
+        valor = coalesce((fn.__qualname__,) + args, lambda: fn(*args))
+        ultimo[0] = (args, valor)
+        return valor
+    return wrapper
+
+def incremental(extender):
+    """
+    Para estructuras derivadas de load_all() con lru_cache por _cache_key(). La ingesta
+    solo agrega filas al final (ids crecientes, nunca borra), así que si la última
+    calculada es del mismo origen la nueva versión sale de extender(anterior, filas
+    nuevas) en vez de reconstruirse desde cero.
+    """
+    def deco(fn):
+        ultimo = [None]  # (key, resultado, último id de fila incluido)
+        lock = threading.Lock()
+
+        @wraps(fn)
+        def wrapper(key, *args):
+            with lock:
+                df = load_all()
+                hasta = df.index[-1] if len(df) else -1
+                prev = ultimo[0]
+                if (prev is not None and prev[0][0][:-1] == key[:-1] and prev[0][1:] == args
+                        and prev[0][0][-1] <= key[-1] and df.index.is_monotonic_increasing):
+                    nuevas = df.iloc[df.index.searchsorted(prev[2], side="right"):]
+                    res = extender(prev[1], nuevas) if len(nuevas) else prev[1]
+                else:
+                    res = fn(key, *args)
+                ultimo[0] = ((key,) + args, res, hasta)
+                return res
+        return wrapper
+    return deco
+
+# ---------- FUENTES DE DATOS (Excel, carpeta CSV/Parquet, SQLite) ----------
+# Cada fuente expone dos lectores:
+#   semanales(ruta) -> [(nombre, df)] en orden, sin la hoja de promedios.
+#                      nombre=None indica formato largo: df trae su propia columna "Semana"
+#                      (archivo/tabla llamado "semanal"); si no, el nombre es la semana, como en Excel.
+#   promedios(ruta) -> df crudo de la hoja de promedios, o None si no existe.
+# La limpieza es común a todas las fuentes (ver _load_all_cached / _load_promedios_cached).
+def _es_hoja_promedios(nombre):
+    n = str(nombre).strip()
+    return n == PROM_SHEET or n.lower() == "promedios"
+
+def _nombre_semana(nombre, df):
+    return None if str(nombre).strip().lower() == "semanal" and "Semana" in df.columns else nombre
+
+def _excel_semanales(path):
+    xls = pd.ExcelFile(path)
+    return [(sh, pd.read_excel(xls, sheet_name=sh)) for sh in xls.sheet_names if not _es_hoja_promedios(sh)]
+
+def _excel_hojas(path):
+    with pd.ExcelFile(path) as xls:
+        return [sh for sh in xls.sheet_names if not _es_hoja_promedios(sh)]
+
+def _excel_hoja(path, nombre):
+    return pd.read_excel(path, sheet_name=nombre)
+
+def _excel_promedios(path):
+    try:
+        return pd.read_excel(path, sheet_name=PROM_SHEET)
+    except Exception:
+        return None
+
+def _dir_archivos(path):
+    """{nombre de hoja: archivo} para los .csv/.parquet de la carpeta (nombre = nombre del archivo)."""
+    out = {}
+    for fn in sorted(os.listdir(path), key=_natural_key):
+        stem, ext = os.path.splitext(fn)
+        if ext.lower() in {".csv", ".parquet", ".pq"}:
+            out.setdefault(stem, os.path.join(path, fn))
+    return out
+
+def _dir_leer(fpath):
+    if fpath.lower().endswith(".csv"):
+        # round_trip: mismos floats que el Excel (evita que _sanitize_numeric lea '1234.567' como miles)
+        return pd.read_csv(fpath, float_precision="round_trip")
+    try:
+        return pd.read_parquet(fpath)
+    except ImportError as e:
+        raise RuntimeError(f"DATA_SOURCE con .parquet ({fpath}) requiere pyarrow instalado") from e
+
+def _dir_semanales(path):
+    out = []
+    for nombre, fpath in _dir_archivos(path).items():
+        if _es_hoja_promedios(nombre):
+            continue
+        df = _dir_leer(fpath)
+        out.append((_nombre_semana(nombre, df), df))
+    return out
+
+def _dir_hojas(path):
+    return [n for n in _dir_archivos(path) if not _es_hoja_promedios(n)]
+
+def _dir_hoja(path, nombre):
+    return _dir_leer(_dir_archivos(path)[nombre])
+
+def _dir_promedios(path):
+    for nombre, fpath in _dir_archivos(path).items():
+        if _es_hoja_promedios(nombre):
+            return _dir_leer(fpath)
+    return None
+
+def _sqlite_solo_lectura(path):
+    # URI escapada: una ruta con '?', '#' o '%' no debe partir la URI
+    return sqlite3.connect(f"file:{urllib.parse.quote(os.path.abspath(path))}?mode=ro", uri=True)
+
+def _sqlite_tablas(con):
+    rows = con.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'view') ORDER BY rowid").fetchall()
+    return [r[0] for r in rows if not r[0].startswith("sqlite_")]
+
+def _sqlite_leer(con, tabla):
+    return pd.read_sql_query('SELECT * FROM "{}"'.format(tabla.replace('"', '""')), con)
+
+def _sqlite_semanales(path):
+    with closing(_sqlite_solo_lectura(path)) as con:
+        out = []
+        for t in _sqlite_tablas(con):
+            if _es_hoja_promedios(t):
+                continue
+            df = _sqlite_leer(con, t)
+            out.append((_nombre_semana(t, df), df))
+        return out
+
+def _sqlite_hojas(path):
+    with closing(_sqlite_solo_lectura(path)) as con:
+        return [t for t in _sqlite_tablas(con) if not _es_hoja_promedios(t)]
+
+def _sqlite_hoja(path, nombre):
+    with closing(_sqlite_solo_lectura(path)) as con:
+        return _sqlite_leer(con, nombre)
+
+def _sqlite_promedios(path):
+    with closing(_sqlite_solo_lectura(path)) as con:
+        for t in _sqlite_tablas(con):
+            if _es_hoja_promedios(t):
+                return _sqlite_leer(con, t)
+    return None
+
+DATA_LOADERS = {
+    "excel":  (_excel_semanales, _excel_promedios),
+    "dir":    (_dir_semanales, _dir_promedios),
+    "sqlite": (_sqlite_semanales, _sqlite_promedios),
+}
+
+# Para el parseo paralelo: hojas(ruta) -> nombres semanales en orden; hoja(ruta, nombre) -> df crudo
+DATA_HOJAS = {
+    "excel":  (_excel_hojas, _excel_hoja),
+    "dir":    (_dir_hojas, _dir_hoja),
+    "sqlite": (_sqlite_hojas, _sqlite_hoja),
+}
+
+def _data_source():
+    """
+    (tipo, ruta) según DATA_SOURCE o, si no está, EXCEL_PATH:
+      sqlite:///datos.db, *.db/*.sqlite  -> SQLite (una tabla por hoja)
+      dir://carpeta o una carpeta        -> un .csv/.parquet por hoja
+      *.xlsx                             -> Excel
+    """
+    uri = DATA_SOURCE or EXCEL_PATH
+    if uri.startswith("sqlite:///"):
+        return "sqlite", uri[len("sqlite:///"):]
+    if uri.startswith("dir://"):
+        return "dir", uri[len("dir://"):]
+    if os.path.splitext(uri)[1].lower() in {".db", ".sqlite", ".sqlite3"}:
+        return "sqlite", uri
+    if os.path.isdir(uri):
+        return "dir", uri
+    return "excel", uri
+
 # ---------- CARGA + LIMPIEZA (con cache) ----------
 @lru_cache(maxsize=1)
+def _source_key():
+    kind, path = _data_source()
+    return kind, os.path.abspath(path)
+
 def _cache_key():
-    return os.path.abspath(EXCEL_PATH)
+    """Identidad del snapshot vivo: fuente + versión de la ingesta (bytes aplicados del store)."""
+    return _source_key() + (_INGESTA.version,)
 
+@single_flight
 @lru_cache(maxsize=1)
 def _load_all_cached(_key):
-    if not os.path.exists(EXCEL_PATH):
+    kind, path = _key
+    if not os.path.exists(path):
         cols = [COL_ESPECTRO, COL_CANDIDATO, COL_RED, COL_LIKES, COL_MAXLIKES, COL_TEMA, COL_COMENT, "Semana"]
         return pd.DataFrame(columns=cols)
+    if _parseo_paralelo():
+        return _parseo_paralelo_cached(_key)[0]
 
-    xls = pd.ExcelFile(EXCEL_PATH)
     frames = []
-    for sh in xls.sheet_names:
-        if sh.strip() == PROM_SHEET:
-            continue  # la hoja de promedios se carga aparte
-        df = pd.read_excel(EXCEL_PATH, sheet_name=sh)
-        if df.empty or df.dropna(how="all").empty:
-            continue
-        etiqueta = WEEK_MAP.get(sh, sh)  # si no está mapeada, deja el nombre tal cual
-        df["Semana"] = etiqueta
-        frames.append(df)
+    for sh, df in DATA_LOADERS[kind][0](path):
+        df = _etiquetar_hoja(sh, df)
+        if df is not None:
+            frames.append(df)
 
     if not frames:
         cols = [COL_ESPECTRO, COL_CANDIDATO, COL_RED, COL_LIKES, COL_MAXLIKES, COL_TEMA, COL_COMENT, "Semana"]
         return pd.DataFrame(columns=cols)
 
-    df = pd.concat(frames, ignore_index=True)
+    return _compactar(_dedup_semanal(_limpiar_semanal(pd.concat(frames, ignore_index=True))), SEMANAL_COLS)
 
+def _etiquetar_hoja(sh, df):
+    """Columna Semana de una hoja (None si la hoja está vacía y se omite)."""
+    if df.empty or df.dropna(how="all").empty:
+        return None
+    if sh is None:
+        # Formato largo: la semana viene por fila (acepta 'Semana N' o la etiqueta)
+        df["Semana"] = df["Semana"].map(lambda w: WEEK_MAP.get(str(w).strip(), w))
+    else:
+        etiqueta = WEEK_MAP.get(sh, sh)  # si no está mapeada, deja el nombre tal cual
+        df["Semana"] = etiqueta
+    return df
+
+def _limpiar_semanal(df):
+    """Limpieza por fila de las hojas semanales (común a la carga y a la ingesta)."""
     # Limpieza de strings
     for c in [COL_ESPECTRO, COL_CANDIDATO, COL_RED, COL_TEMA, "Semana"]:
         if c in df.columns:
@@ -118,17 +556,222 @@ def _load_all_cached(_key):
     if COL_COMENT in df.columns:
         df[COL_COMENT] = _sanitize_numeric(df[COL_COMENT])
 
-    # Filtrado base + dedup
-    df = df[df[COL_CANDIDATO].notna() & df[COL_RED].notna() & df["Semana"].notna()]
+    # Filtrado base
+    return df[df[COL_CANDIDATO].notna() & df[COL_RED].notna() & df["Semana"].notna()]
+
+def _dedup_semanal(df):
+    """Dedup entre hojas (gana la primera aparición) + columna Interacciones."""
     keys = [COL_CANDIDATO, "Semana", COL_RED] + ([COL_TEMA] if COL_TEMA in df.columns else [])
     df = df.drop_duplicates(subset=[k for k in keys if k in df.columns], keep="first")
 
-    # Interacciones
-    df["Interacciones"] = df[COL_LIKES].fillna(0) + df[COL_COMENT].fillna(0)
+    df["Interacciones"] = _interacciones(df)
+    return df
+
+def _interacciones(df):
+    """Likes + comentarios; un valor o una columna que falta cuenta como 0."""
+    return sum((df[c].fillna(0) if c in df.columns else 0) for c in (COL_LIKES, COL_COMENT)) + 0.0
+
+# ---------- Presupuesto de memoria (poda de columnas + dtypes compactos) ----------
+# Columnas que usan los endpoints; el resto (Suma, Unnamed: N, notas) no se guarda
+SEMANAL_COLS = [COL_ESPECTRO, COL_CANDIDATO, COL_RED, COL_LIKES, COL_MAXLIKES, COL_TEMA, COL_COMENT,
+                "Semana", "Interacciones"]
+PROM_COLS = [PROM_COL_ESPECTRO, PROM_COL_CANDIDATO, PROM_COL_RED, PROM_COL_SEMANA,
+             PROM_COL_INTERSEM, PROM_COL_LIKES, PROM_COL_COMENT, "_SemanaEff"]
+# Columnas que se promedian: siguen en float64 (la media en float32 movería el redondeo
+# en los bordes .x5 y rompería la paridad con el motor SQLite)
+_COLS_MEDIA = {COL_LIKES, COL_COMENT, "Interacciones", PROM_COL_INTERSEM, PROM_COL_LIKES, PROM_COL_COMENT}
+
+def _compactar(df, cols):
+    """Poda a `cols`, texto repetido -> category y float64 -> float32 solo si es exacto."""
+    df = df[[c for c in cols if c in df.columns]].copy()
+    for c in df.columns:
+        s = df[c]
+        if s.dtype == object and len(s):
+            if s.nunique(dropna=True) <= CATEGORY_MAX_RATIO * len(s):
+                df[c] = s.astype("category")
+        elif s.dtype == np.float64 and c not in _COLS_MEDIA:
+            f = s.to_numpy().astype(np.float32)
+            if np.array_equal(f.astype(np.float64), s.to_numpy(), equal_nan=True):
+                df[c] = f
     return df
 
+def _memoria_frame(df):
+    """Bytes (deep) por columna y total de un DataFrame."""
+    if df is None:
+        return None
+    uso = df.memory_usage(deep=True, index=True)
+    return {
+        "filas": int(len(df)),
+        "bytes": int(uso.sum()),
+        "columnas": {str(c): {"dtype": str(df[c].dtype), "bytes": int(uso[c])} for c in df.columns},
+    }
+
+# ---------- INGESTA INCREMENTAL (store local append-only) ----------
+class _Ingesta:
+    """
+    Filas semanales agregadas por POST /api/ingesta. Cada lote se guarda como una
+    línea JSON en INGEST_STORE; todos los procesos reproducen el archivo desde el
+    último byte aplicado (version), así que los workers convergen y un reinicio
+    solo re-limpia los lotes, sin volver a leer el Excel.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.version = 0          # bytes del store ya aplicados
+        self.huella = ""          # sha256 de esos bytes (identidad de contenido para la cache en disco)
+        self._sha = hashlib.sha256()
+        self.lotes = []           # DataFrames limpios, en orden de llegada
+        self.cambio = threading.Condition()  # avisa a los long-poll de /api/version
+        self._base = None
+        self._df = None
+        self._claves = None       # claves de dedup ya presentes en _df
+        self._siguiente = 0       # próximo id de fila
+
+    def frame(self, base):
+        """Snapshot vivo: base + lotes, con el mismo dedup 'keep first' que entre hojas."""
+        df = self._df
+        if df is not None and self._base is base:
+            return df
+        with self.lock:
+            if self._df is None or self._base is not base:
+                self._df, self._base = base, base
+                self._claves = set(_claves_dedup(base))
+                self._siguiente = int(base.index.max()) + 1 if len(base) else 0
+                validos = []
+                for lote in self.lotes:
+                    try:
+                        self._df = self._anexar(self._df, lote)
+                    except Exception:
+                        # Un lote que no se puede aplicar no debe tumbar el snapshot en cada arranque
+                        app.logger.exception("Lote de ingesta inválido en %s; se omite", self.path)
+                        continue
+                    validos.append(lote)
+                self.lotes = validos
+            return self._df
+
+    def validar(self, registro):
+        """Prepara el registro como al reproducirlo, sin aplicarlo; lanza si no se podría aplicar."""
+        lote = _lote_de_registro(registro)
+        if lote is not None:
+            self._preparar(load_all().iloc[:0], lote, set())
+
+    def _anexar(self, df, lote):
+        """
+        df + las filas del lote cuya clave no está todavía ('keep first' contra lo cargado
+        y dentro del lote). Solo se procesa el lote: ids nuevos a continuación de los
+        existentes (las estructuras derivadas se extienden, ver incremental) y mismos
+        dtypes compactos que df (category con categorías unidas, float32 si es exacto).
+        El estado (claves, próximo id) solo cambia si todo el lote se pudo preparar.
+        """
+        vistas = set()
+        df, lote = self._preparar(df, lote, vistas)
+        if lote is None:
+            return df
+        lote.index = pd.RangeIndex(self._siguiente, self._siguiente + len(lote))
+        self._claves |= vistas
+        self._siguiente += len(lote)
+        return pd.concat([df, lote]) if len(df) else lote
+
+    def _preparar(self, df, lote, vistas):
+        """(df, filas nuevas del lote con los dtypes de df); las claves nuevas quedan en `vistas`."""
+        nuevas = []
+        for i, k in enumerate(_claves_dedup(lote)):
+            if k not in self._claves and k not in vistas:
+                vistas.add(k)
+                nuevas.append(i)
+        if not nuevas:
+            return df, None
+        lote = lote.iloc[nuevas].copy()
+        lote["Interacciones"] = _interacciones(lote)
+        cols = [c for c in SEMANAL_COLS if c in df.columns or c in lote.columns]
+        df, lote = df.reindex(columns=cols), lote.reindex(columns=cols)
+        for c in cols:
+            if isinstance(df[c].dtype, pd.CategoricalDtype):
+                faltan = pd.Index(lote[c].dropna().unique()).difference(df[c].cat.categories)
+                if len(faltan):
+                    df[c] = df[c].cat.add_categories(faltan)
+                lote[c] = pd.Categorical(lote[c], categories=df[c].cat.categories)
+            elif df[c].dtype == np.float32:
+                f = lote[c].to_numpy(dtype=np.float64)
+                if np.array_equal(f.astype(np.float32).astype(np.float64), f, equal_nan=True):
+                    lote[c] = f.astype(np.float32)
+            elif df[c].dtype == object:
+                lote[c] = lote[c].astype(object).where(lote[c].notna(), None)
+        return df, lote
+
+    def _aplicar(self, registro):
+        lote = _lote_de_registro(registro)
+        if lote is None:
+            return None
+        if self._df is not None:
+            self._df = self._anexar(self._df, lote)  # si falla, el lote no queda en self.lotes
+        self.lotes.append(lote)
+        return lote
+
+    def sync(self):
+        """Aplica las líneas nuevas del store (si otro proceso escribió, también)."""
+        try:
+            size = os.stat(self.path).st_size
+        except OSError:
+            return
+        if size <= self.version:
+            return
+        with self.lock:
+            with open(self.path, "rb") as fh:
+                fh.seek(self.version)
+                data = fh.read()
+            end = data.rfind(b"\n") + 1  # solo líneas completas
+            for line in data[:end].splitlines():
+                if not line.strip():
+                    continue
+                try:
+                    self._aplicar(json.loads(line))
+                except Exception:
+                    app.logger.exception("Lote de ingesta inválido en %s; se omite", self.path)
+            self._sha.update(data[:end])
+            self.huella = self._sha.hexdigest()
+            self.version += end
+        with self.cambio:
+            self.cambio.notify_all()
+
+    def append(self, registro):
+        """Escribe un lote en el store (con lock de archivo entre procesos) y lo aplica."""
+        line = (json.dumps(registro, ensure_ascii=False, allow_nan=False) + "\n").encode("utf-8")
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, "ab") as fh:
+            if fcntl is not None:
+                fcntl.flock(fh, fcntl.LOCK_EX)
+            try:
+                fh.write(line)
+                fh.flush()
+                os.fsync(fh.fileno())
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(fh, fcntl.LOCK_UN)
+        self.sync()
+
+def _lote_de_registro(registro):
+    """Filas limpias de una línea del store (None si no trae filas)."""
+    filas = pd.DataFrame(registro.get("filas") or [])
+    if filas.empty:
+        return None
+    semana = registro.get("semana")
+    if semana:
+        filas["Semana"] = WEEK_MAP.get(semana, semana)
+    else:
+        filas["Semana"] = filas["Semana"].map(lambda w: WEEK_MAP.get(str(w).strip(), w))
+    return _limpiar_semanal(filas)
+
+def _claves_dedup(df):
+    """Claves de _dedup_semanal (NA -> None, igual que drop_duplicates) fila a fila."""
+    partes = [df[c].astype(object).where(df[c].notna(), None) if c in df.columns else [None] * len(df)
+              for c in (COL_CANDIDATO, "Semana", COL_RED, COL_TEMA)]
+    return list(zip(*partes))
+
+_INGESTA = _Ingesta(INGEST_STORE)
+
 def load_all():
-    return _load_all_cached(_cache_key())
+    return _INGESTA.frame(_load_all_cached(_source_key()))
 
 # ---------- Normalización de SEMANA (tolerante) ----------
 def _normalize_week_strict(s: str):
@@ -177,15 +820,16 @@ def _normalize_week_strict(s: str):
     return s1
 
 # ---------- CARGA DE LA HOJA DE PROMEDIOS ----------
+@single_flight
 @lru_cache(maxsize=1)
 def _load_promedios_cached(_key):
-    if not os.path.exists(EXCEL_PATH):
-        cols = [PROM_COL_ESPECTRO, PROM_COL_CANDIDATO, PROM_COL_RED,
-                PROM_COL_SEMANA, PROM_COL_INTERSEM, PROM_COL_LIKES, PROM_COL_COMENT]
-        return pd.DataFrame(columns=cols)
-    try:
-        df = pd.read_excel(EXCEL_PATH, sheet_name=PROM_SHEET)
-    except Exception:
+    if _parseo_paralelo() and os.path.exists(_key[1]):
+        return _parseo_paralelo_cached(_key)[1]
+    return _promedios_limpios(*_key)
+
+def _promedios_limpios(kind, path):
+    df = DATA_LOADERS[kind][1](path) if os.path.exists(path) else None
+    if df is None:
         cols = [PROM_COL_ESPECTRO, PROM_COL_CANDIDATO, PROM_COL_RED,
                 PROM_COL_SEMANA, PROM_COL_INTERSEM, PROM_COL_LIKES, PROM_COL_COMENT]
         return pd.DataFrame(columns=cols)
@@ -213,10 +857,281 @@ def _load_promedios_cached(_key):
 
     # Filtrado mínimo
     df = df[df[PROM_COL_CANDIDATO].notna() & df[PROM_COL_RED].notna()]
-    return df
+    return _compactar(df, PROM_COLS)
 
 def load_promedios():
-    return _load_promedios_cached(_cache_key())
+    return _load_promedios_cached(_source_key())
+
+# ---------- Parseo paralelo de hojas (PARSE_WORKERS > 1) ----------
+def _parseo_paralelo():
+    # Solo con fork: con spawn cada proceso reimportaría el módulo (y arrancaría su propio warm-up).
+    # Y solo desde el hilo principal sin otros hilos vivos (--preload): un fork con otros hilos
+    # corriendo copia sus locks tomados y el hijo puede quedar bloqueado para siempre. Desde el
+    # hilo de warm-up o un request la carga es secuencial (mismo resultado). El import de app
+    # sigue en curso en ese momento: los hijos reciben las tareas por parseo.ejecutar, sin importarlo.
+    return (PARSE_WORKERS > 1 and "fork" in multiprocessing.get_all_start_methods()
+            and threading.current_thread() is threading.main_thread() and threading.active_count() == 1)
+
+def _hoja_limpia(kind, path, nombre):
+    """Tarea del pool: lee, etiqueta y limpia una hoja semanal. Devuelve (df, filas crudas)."""
+    df = DATA_HOJAS[kind][1](path, nombre).reset_index(drop=True)
+    df = _etiquetar_hoja(_nombre_semana(nombre, df), df)
+    if df is None:
+        return None, 0
+    n = len(df)
+    return _limpiar_semanal(df), n
+
+parseo.TAREAS.update(hoja=_hoja_limpia, promedios=_promedios_limpios)
+
+@single_flight
+@lru_cache(maxsize=1)
+def _parseo_paralelo_cached(_key):
+    """
+    (semanal, promedios) con una hoja por tarea en un pool de procesos; la de
+    promedios va en el mismo pool, así que la carga tarda ~ la hoja más grande.
+    El resultado es el mismo que la carga secuencial, incluidos los ids de fila.
+    """
+    kind, path = _key
+    hojas = DATA_HOJAS[kind][0](path)
+    ctx = multiprocessing.get_context("fork")
+    with ProcessPoolExecutor(max_workers=min(PARSE_WORKERS, len(hojas) + 1), mp_context=ctx) as pool:
+        prom = pool.submit(parseo.ejecutar, "promedios", kind, path)
+        partes = [f.result() for f in [pool.submit(parseo.ejecutar, "hoja", kind, path, h) for h in hojas]]
+        prom = prom.result()
+
+    frames, offset = [], 0
+    for df, n in partes:
+        if df is None:
+            continue
+        df.index = df.index + offset  # mismo índice que concat(ignore_index=True) + filtrado
+        offset += n
+        if len(df):
+            frames.append(df)
+    if not frames:
+        cols = [COL_ESPECTRO, COL_CANDIDATO, COL_RED, COL_LIKES, COL_MAXLIKES, COL_TEMA, COL_COMENT, "Semana"]
+        return pd.DataFrame(columns=cols), prom
+
+    df = pd.concat(frames)
+    # Una columna ausente en alguna hoja queda NaN tras el concat; la limpieza secuencial la deja en None
+    for c in [COL_ESPECTRO, COL_CANDIDATO, COL_RED, COL_TEMA, "Semana"]:
+        if c in df.columns and df[c].dtype == object:
+            df[c] = df[c].where(df[c].notna(), None)
+    return _compactar(_dedup_semanal(df), SEMANAL_COLS), prom
+
+# ---------- Snapshot compartido entre workers (gunicorn --preload) ----------
+def build_snapshot():
+    """Carga ambos DataFrames (y la dimensión de candidatos) en el lru_cache del proceso actual."""
+    _INGESTA.sync()
+    snap = load_all(), load_promedios()
+    load_candidatos()
+    _indice_candidatos_cached(_cache_key())
+    _indice_temas_cached(_cache_key())
+    _top_publicaciones_cached(_cache_key())
+    return snap
+
+# ---------- Dimensión de candidatos (una vez por snapshot) ----------
+def _contar_pares(conteo, redes, cands, esps, reds):
+    """Suma (candidato, espectro, red) a los conteos; copia antes de tocar (los previos son compartidos)."""
+    tocados = set()
+    for c, e, r in zip(cands, esps, reds):
+        if pd.isna(c):
+            continue
+        if c not in tocados:
+            tocados.add(c)
+            conteo[c], redes[c] = Counter(conteo.get(c, ())), set(redes.get(c, ()))
+        if not pd.isna(e):
+            conteo[c][e] += 1
+        if not pd.isna(r):
+            redes[c].add(r)
+    return tocados
+
+def _dim_candidatos(conteo, redes, nombres):
+    """Espectro canónico (el más frecuente; empate -> alfabético, como mode().iat[0]) y redes ordenadas."""
+    dim = pd.DataFrame(index=pd.Index(sorted(nombres), name="candidato"))
+    dim["espectro"] = pd.Series([min(conteo[c].items(), key=lambda kv: (-kv[1], kv[0]))[0] if conteo[c] else None
+                                 for c in dim.index], index=dim.index, dtype=object)
+    dim["redes"] = pd.Series([tuple(sorted(redes[c])) for c in dim.index], index=dim.index, dtype=object)
+    return dim
+
+def _extender_candidatos(prev, nuevas):
+    dim, conteo, redes = prev
+    conteo, redes = dict(conteo), dict(redes)
+    tocados = _contar_pares(conteo, redes, nuevas[COL_CANDIDATO], nuevas[COL_ESPECTRO], nuevas[COL_RED])
+    if not tocados:
+        return prev
+    filas = _dim_candidatos(conteo, redes, tocados)
+    return pd.concat([dim.drop(filas.index, errors="ignore"), filas]).sort_index(), conteo, redes
+
+@single_flight
+@lru_cache(maxsize=1)
+@incremental(_extender_candidatos)
+def _load_candidatos_cached(_key):
+    """
+    Espectro canónico y redes en las que aparece cada candidato, sobre ambas hojas.
+    Devuelve también los conteos para que un lote de ingesta solo recalcule a sus candidatos.
+    """
+    df, prom = load_all(), load_promedios()
+    conteo, redes = {}, {}
+    _contar_pares(conteo, redes, df[COL_CANDIDATO], df[COL_ESPECTRO], df[COL_RED])
+    _contar_pares(conteo, redes, prom[PROM_COL_CANDIDATO], prom[PROM_COL_ESPECTRO], prom[PROM_COL_RED])
+    return _dim_candidatos(conteo, redes, redes), conteo, redes
+
+def load_candidatos():
+    return _load_candidatos_cached(_cache_key())[0]
+
+# ---------- Índice de prefijos de candidatos (una vez por snapshot) ----------
+def _entradas_candidato(nombre):
+    """(clave, posición de la palabra, nombre): el nombre completo y desde cada palabra."""
+    palabras = _sin_acentos(nombre).split(" ")
+    return {(" ".join(palabras[i:]), i, nombre) for i in range(len(palabras))}
+
+def _extender_indice_candidatos(prev, nuevas):
+    claves, nombres, exactos = prev
+    conocidos = {n for ns in exactos.values() for n in ns}
+    nuevos = sorted(set(nuevas[COL_CANDIDATO].dropna()) - conocidos)
+    if not nuevos:
+        return prev
+    exactos = dict(exactos)
+    for nombre in nuevos:
+        norm = _sin_acentos(nombre)
+        exactos[norm] = sorted(exactos.get(norm, []) + [nombre])
+    entradas = list(heapq.merge(((c, pos, n) for c, (pos, n) in zip(claves, nombres)),
+                                sorted(set().union(*map(_entradas_candidato, nuevos)))))
+    return [e[0] for e in entradas], [(e[1], e[2]) for e in entradas], exactos
+
+@single_flight
+@lru_cache(maxsize=1)
+@incremental(_extender_indice_candidatos)
+def _indice_candidatos_cached(_key):
+    """
+    Claves normalizadas ordenadas (nombre completo y desde cada palabra, para que
+    'uribe' encuentre 'Miguel Uribe Londoño') + nombre canónico, para bisect.
+    """
+    entradas, exactos = set(), {}
+    for nombre in load_candidatos().index:
+        exactos.setdefault(_sin_acentos(nombre), []).append(nombre)
+        entradas |= _entradas_candidato(nombre)
+    entradas = sorted(entradas)
+    return [e[0] for e in entradas], [(e[1], e[2]) for e in entradas], exactos
+
+def buscar_candidatos(q, limit=10):
+    """Candidatos cuyo nombre (o alguna palabra) empieza por q; primero los que empiezan por el nombre."""
+    claves, nombres, _ = _indice_candidatos_cached(_cache_key())
+    pref = _sin_acentos(q)
+    if not pref:
+        return []
+    hits = {}
+    i = bisect_left(claves, pref)
+    while i < len(claves) and claves[i].startswith(pref):
+        pos, nombre = nombres[i]
+        hits[nombre] = min(pos, hits.get(nombre, pos))
+        i += 1
+    return sorted(hits, key=lambda n: (hits[n], _sin_acentos(n)))[:limit]
+
+# ---------- Índice invertido de temas (una vez por snapshot) ----------
+@lru_cache(maxsize=1)
+def _temas_dict():
+    """Sin diccionario válido no hay temas con nombre: toda fila con tema cae en TEMA_OTROS."""
+    try:
+        with open(TEMAS_PATH, encoding="utf-8") as fh:
+            return {str(k): [str(p) for p in v] for k, v in json.load(fh).items()}
+    except (OSError, ValueError, AttributeError, TypeError):
+        app.logger.exception("TEMAS_PATH inválido (%s); sin diccionario de temas", TEMAS_PATH)
+        return {}
+
+_SIN_FILAS = np.empty(0, dtype=np.int64)
+
+def _filas_frase(vocab, postings, frase):
+    """Filas cuyo tema contiene todas las palabras de la frase (cada una como prefijo)."""
+    res = None
+    for palabra in frase.split():
+        i = bisect_left(vocab, palabra)
+        partes = []
+        while i < len(vocab) and vocab[i].startswith(palabra):
+            partes.append(postings[i])
+            i += 1
+        filas = np.unique(np.concatenate(partes)) if partes else _SIN_FILAS
+        res = filas if res is None else np.intersect1d(res, filas, assume_unique=True)
+    return _SIN_FILAS if res is None else res
+
+def _postings_temas(df):
+    """Vocabulario ordenado -> ids de fila de df, y las filas con algún tema."""
+    postings, con_tema = {}, []
+    if COL_TEMA in df.columns:
+        for fila, texto in zip(df.index, df[COL_TEMA]):
+            if not _valid_str(texto):
+                continue
+            con_tema.append(fila)
+            for tok in set(re.findall(r"\w+", _sin_acentos(texto))):
+                postings.setdefault(tok, []).append(fila)
+    vocab = sorted(postings)
+    return vocab, [np.array(postings[t], dtype=np.int64) for t in vocab], np.array(con_tema, dtype=np.int64)
+
+def _filas_por_tema(vocab, listas, con_tema):
+    """Por tema del diccionario la unión de sus prefijos; lo que no cae en ninguno va a TEMA_OTROS."""
+    temas = {}
+    for tema, prefijos in _temas_dict().items():
+        partes = [_filas_frase(vocab, listas, _sin_acentos(p)) for p in prefijos]
+        temas[tema] = np.unique(np.concatenate(partes)) if partes else _SIN_FILAS
+    cubiertas = np.unique(np.concatenate(list(temas.values()))) if temas else _SIN_FILAS
+    temas[TEMA_OTROS] = np.setdiff1d(con_tema, cubiertas, assume_unique=True)
+    return temas
+
+def _extender_temas(prev, nuevas):
+    """
+    Los ids nuevos son mayores que todos los previos: se anexan al final de cada
+    posting (siguen ordenadas) y la pertenencia a temas es por fila, así que basta
+    con resolverla sobre un índice de las filas nuevas.
+    """
+    vocab, listas, temas, claves = prev
+    n_vocab, n_listas, n_con = _postings_temas(nuevas)
+    if not len(n_con):
+        return prev
+    vocab, listas = list(vocab), list(listas)
+    for tok, ids in zip(n_vocab, n_listas):
+        i = bisect_left(vocab, tok)
+        if i < len(vocab) and vocab[i] == tok:
+            listas[i] = np.concatenate([listas[i], ids])
+        else:
+            vocab.insert(i, tok)
+            listas.insert(i, ids)
+    n_temas = _filas_por_tema(n_vocab, n_listas, n_con)
+    temas = {t: np.concatenate([ids, n_temas[t]]) for t, ids in temas.items()}
+    return vocab, listas, temas, claves
+
+@single_flight
+@lru_cache(maxsize=1)
+@incremental(_extender_temas)
+def _indice_temas_cached(_key):
+    """
+    Vocabulario normalizado de COL_TEMA (ordenado, para bisect) -> ids de fila
+    (etiquetas del índice de load_all()), y por tema del diccionario la unión de
+    sus prefijos. Filtrar o desglosar por tema es un isin sobre enteros.
+    """
+    vocab, listas, con_tema = _postings_temas(load_all())
+    temas = _filas_por_tema(vocab, listas, con_tema)
+    claves = {_sin_acentos(t): t for t in temas}
+    return vocab, listas, temas, claves
+
+def _temas_param():
+    """?tema=A,B -> ids de fila (unión). Acepta temas del diccionario o palabras sueltas. None si no se filtra."""
+    pedidos = _parse_multi((request.args.get("tema") or "").strip())
+    if not pedidos:
+        return None
+    vocab, listas, temas, claves = _indice_temas_cached(_cache_key())
+    partes = []
+    for p in pedidos:
+        norm = _sin_acentos(p)
+        partes.append(temas[claves[norm]] if norm in claves else _filas_frase(vocab, listas, norm))
+    return np.unique(np.concatenate(partes))
+
+def _candidatos_param():
+    """?candidato=A,B resuelto a nombres canónicos (sin tildes ni mayúsculas). None si no se filtra."""
+    pedidos = _parse_multi((request.args.get("candidato") or "").strip())
+    if not pedidos:
+        return None
+    exactos = _indice_candidatos_cached(_cache_key())[2]
+    return sorted({n for p in pedidos for n in exactos.get(_sin_acentos(p), [])})
 
 # ---------- Filtros ----------
 def _month_abbrev_list(mes_multi):
@@ -228,6 +1143,9 @@ def _month_abbrev_list(mes_multi):
     return abrev
 
 def aplicar_filtros(df):
+    filas_tema = _temas_param()
+    if filas_tema is not None:
+        df = df[df.index.isin(filas_tema)]
     red_multi      = _parse_multi((request.args.get("red") or "").strip())
     semana_multi   = _parse_multi((request.args.get("semana") or "").strip())
     espectro_multi = _parse_multi((request.args.get("espectro") or "").strip())
@@ -247,6 +1165,9 @@ def aplicar_filtros(df):
         if abrev:
             mask = df["Semana"].astype(str).apply(lambda s: any(a in s for a in abrev))
             df = df[mask]
+    candidatos = _candidatos_param()
+    if candidatos is not None:
+        df = df[df[COL_CANDIDATO].isin(candidatos)]
     return df
 
 def aplicar_filtros_prom(df):
@@ -270,8 +1191,19 @@ def aplicar_filtros_prom(df):
         if abrev:
             mask = df["_SemanaEff"].astype(str).apply(lambda s: any(a in s for a in abrev))
             df = df[mask]
+    candidatos = _candidatos_param()
+    if candidatos is not None:
+        df = df[df[PROM_COL_CANDIDATO].isin(candidatos)]
     return df
 
+def _metric_column(metric):
+    """Columna de las hojas semanales para ?metric= (interacciones por defecto)."""
+    if metric == "likes":
+        return COL_LIKES
+    if metric == "comentarios":
+        return COL_COMENT
+    return "Interacciones"
+
 # === Promedio de filas por candidato (para hojas semanales) ===
 def _mean_of_all_rows(df, value_col):
     if df.empty:
@@ -279,18 +1211,179 @@ def _mean_of_all_rows(df, value_col):
     x = df.copy()
     x[value_col] = pd.to_numeric(x[value_col], errors="coerce")
     x = x[x[value_col].notna()]
-    esp_map = (
-        x.groupby(COL_CANDIDATO)[COL_ESPECTRO]
-         .agg(lambda s: s.mode().iat[0] if not s.mode().empty else s.dropna().iat[0] if s.dropna().size else None)
-         .to_dict()
-    )
-    final = x.groupby(COL_CANDIDATO, as_index=False)[value_col].mean()
-    final[COL_ESPECTRO] = final[COL_CANDIDATO].map(esp_map)
+    final = x.groupby(COL_CANDIDATO, as_index=False, observed=True)[value_col].mean()
+    final[COL_ESPECTRO] = final[COL_CANDIDATO].astype(object).map(load_candidatos()["espectro"])
     return final
 
+# === Barras: una sola agregación multi-métrica sobre la hoja de promedios ===
+# La hoja de promedios no tiene tema: ?tema= solo filtra los paneles de hojas semanales
+FILTER_PARAMS = ("red", "semana", "espectro", "mes", "candidato")
+
+def _filter_key():
+    """Valores crudos de los parámetros de filtro (clave de caches por filtro)."""
+    return tuple((request.args.get(p) or "").strip() for p in FILTER_PARAMS)
+
+def _promedios_por_candidato():
+    return _promedios_por_candidato_cached(_cache_key(), _filter_key())
+
+@single_flight
+@lru_cache(maxsize=64)
+def _promedios_por_candidato_cached(_key, _filtros):
+    # aplicar_filtros_prom lee request.args; _filtros los contiene, así que la clave es completa
+    df = aplicar_filtros_prom(load_promedios())
+    cols = [c for c in (PROM_COL_LIKES, PROM_COL_COMENT, PROM_COL_INTERSEM) if c in df.columns]
+    if df.empty or not cols:
+        return None
+    return df.groupby(PROM_COL_CANDIDATO, observed=True)[cols].mean()
+
+def _barras_por_candidato(value_col, out_key):
+    """Lista [{candidato, espectro, out_key}] ordenada desc. (respeta top/limit/offset)."""
+    agg = _promedios_por_candidato()
+    if agg is None or value_col not in agg.columns:
+        return jsonify([])
+    serie = agg[value_col].dropna()
+    g = pd.DataFrame({"candidato": serie.index, "valor": serie.to_numpy()})
+    g["espectro"] = g["candidato"].map(load_candidatos()["espectro"]).astype(object)
+    g["espectro"] = g["espectro"].where(g["espectro"].notna(), None)
+    g, total = _ranked(g, "valor")
+    out = [{"candidato": c, "espectro": e, out_key: _r1(v)}
+           for c, e, v in zip(g["candidato"], g["espectro"], g["valor"])]
+    return _with_total(jsonify(out), total)
+
 # ============== APP ==============
 app = Flask(__name__)
 
+# ---------- Profiler bajo demanda ----------
+class _SamplingProfiler:
+    """
+    Muestreo de pilas en un hilo aparte: cada PROFILE_SAMPLE_MS toma el frame
+    actual de los hilos registrados (solo una fracción PROFILE_SAMPLE_RATE de
+    los requests). El hilo duerme si no hay ninguno registrado, así que el resto
+    de los requests no paga nada más que un random().
+    """
+    def __init__(self, interval_s):
+        self.interval_s = interval_s
+        self._lock = threading.Lock()
+        self._active = {}          # thread id -> Counter de pilas colapsadas
+        self._wake = threading.Event()
+        self._thread = None
+
+    def start(self, tid):
+        with self._lock:
+            self._active[tid] = Counter()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def stop(self, tid):
+        with self._lock:
+            return self._active.pop(tid, Counter())
+
+    def _run(self):
+        own = threading.get_ident()
+        while True:
+            self._wake.wait()
+            time.sleep(self.interval_s)
+            frames = sys._current_frames()
+            with self._lock:
+                if not self._active:
+                    self._wake.clear()
+                    continue
+                for tid, counts in self._active.items():
+                    if tid != own and tid in frames:
+                        counts[_collapse_stack(frames[tid])] += 1
+
+def _collapse_stack(frame):
+    """Pila en formato 'collapsed' (raíz;...;hoja) para flamegraph.pl / speedscope."""
+    parts = []
+    while frame is not None:
+        code = frame.f_code
+        parts.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}")
+        frame = frame.f_back
+    return ";".join(reversed(parts))
+
+_SAMPLER = _SamplingProfiler(PROFILE_SAMPLE_MS / 1000.0) if PROFILE_ENABLED else None
+
+def _profile_signature(path, expira):
+    msg = f"{path}\n{expira}".encode("utf-8")
+    return hmac.new(PROFILE_SECRET.encode("utf-8"), msg, hashlib.sha256).hexdigest()
+
+def firmar_perfil(path, ttl_s=None):
+    """Token '<expira>.<firma>' para forzar cProfile en `path` durante ttl_s segundos."""
+    expira = int(time.time() + (PROFILE_TOKEN_TTL_S if ttl_s is None else ttl_s))
+    return f"{expira}.{_profile_signature(path, expira)}"
+
+def _profile_forced():
+    """True si el request trae una firma válida y vigente (?_profile= o cabecera X-Profile-Token)."""
+    if not PROFILE_SECRET:
+        return False
+    token = request.args.get("_profile") or request.headers.get("X-Profile-Token") or ""
+    expira, _, firma = token.partition(".")
+    if not (expira.isascii() and expira.isdigit()) or int(expira) < time.time():
+        return False
+    esperada = _profile_signature(request.path, expira)
+    # compare_digest con str exige ASCII: se comparan bytes para no romper con tokens arbitrarios
+    return hmac.compare_digest(firma.encode("utf-8"), esperada.encode("utf-8"))
+
+def _profile_filename(ext, elapsed_ms):
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", request.path).strip("_") or "root"
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    return os.path.join(PROFILE_DIR, f"{stamp}_{int(elapsed_ms)}ms_{slug}_{threading.get_ident()}.{ext}")
+
+def _rotate_profiles():
+    """Conserva como máximo PROFILE_MAX_FILES archivos y PROFILE_MAX_BYTES en el spool."""
+    try:
+        entries = [(e.path, e.stat()) for e in os.scandir(PROFILE_DIR) if e.is_file()]
+    except FileNotFoundError:
+        return
+    entries.sort(key=lambda e: e[1].st_mtime, reverse=True)
+    total = 0
+    for i, (path, st) in enumerate(entries):
+        total += st.st_size
+        if i >= PROFILE_MAX_FILES or total > PROFILE_MAX_BYTES:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+@app.before_request
+def _profile_before():
+    if _SAMPLER is None:
+        return
+    if _profile_forced():
+        flask_g._prof_t0 = time.perf_counter()
+        prof = cProfile.Profile()
+        flask_g._prof_cprofile = prof
+        prof.enable()
+    elif random.random() < PROFILE_SAMPLE_RATE:
+        flask_g._prof_t0 = time.perf_counter()
+        _SAMPLER.start(threading.get_ident())
+
+@app.teardown_request
+def _profile_teardown(_exc):
+    if _SAMPLER is None or not hasattr(flask_g, "_prof_t0"):
+        return
+    elapsed_ms = (time.perf_counter() - flask_g._prof_t0) * 1000.0
+    prof = getattr(flask_g, "_prof_cprofile", None)
+    if prof is not None:
+        prof.disable()
+    else:
+        stacks = _SAMPLER.stop(threading.get_ident())
+        if elapsed_ms < PROFILE_THRESHOLD_MS or not stacks:
+            return
+    try:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        if prof is not None:
+            prof.dump_stats(_profile_filename("prof", elapsed_ms))
+        else:
+            with open(_profile_filename("folded", elapsed_ms), "w", encoding="utf-8") as fh:
+                for stack, n in stacks.most_common():
+                    fh.write(f"{stack} {n}\n")
+        _rotate_profiles()
+    except OSError:
+        app.logger.exception("No se pudo escribir el perfil")
+
 # ---------- Página ----------
 @app.route("/", methods=["GET", "HEAD"])
 def index():
@@ -374,6 +1467,17 @@ def index():
         <span id="chipsEsp" class="chipwrap"><span class="skeleton" style="display:inline-block;width:200px"></span></span>
       </div>
 
+      <div>
+        <strong>Tema(s):</strong><br>
+        <span id="chipsTema" class="chipwrap"><span class="skeleton" style="display:inline-block;width:200px"></span></span>
+      </div>
+
+      <div>
+        <strong>Candidato(s):</strong><br>
+        <input id="inpCand" list="dlCand" placeholder="Buscar… (separa con comas)" autocomplete="off" style="min-width:220px" />
+        <datalist id="dlCand"></datalist>
+      </div>
+
       <div style="align-self:flex-end">
         <button onclick="aplicar()">Aplicar</button>
         <button onclick="limpiar()">Limpiar</button>
@@ -406,6 +1510,11 @@ def index():
     <div id="heatmap"></div>
   </div>
 
+  <div class="panel" style="margin-top:16px">
+    <h3>Temas que mueven las interacciones (según filtros)</h3>
+    <div id="temas"></div>
+  </div>
+
   <div class="panel" style="margin-top:16px">
     <div class="filters">
       <h3 style="margin:0">Heatmaps semanales (Candidato × Semana)</h3>
@@ -437,6 +1546,21 @@ def index():
     <div id="deltaSemanal"></div>
   </div>
 
+  <div class="panel" style="margin-top:16px">
+    <div class="filters">
+      <h3 style="margin:0">Publicaciones con más likes</h3>
+      <span style="flex:1"></span>
+      <label>Agrupar:</label>
+      <select id="selTopPor">
+        <option value="" selected>Todas</option>
+        <option value="semana">Por semana</option>
+        <option value="espectro">Por espectro</option>
+      </select>
+      <button onclick="dibujarTopPublicaciones()">Aplicar</button>
+    </div>
+    <div id="topPublicaciones"></div>
+  </div>
+
   <!-- >>> NUEVO (DELTA) : GANADOR POR VARIACIÓN -->
   <div class="panel" style="margin-top:16px">
     <h3>Ganadores por variación (Δ) por semana</h3>
@@ -454,7 +1578,7 @@ def index():
 
   const f1 = (v) => Number(v || 0).toLocaleString('es-ES', { minimumFractionDigits: 1, maximumFractionDigits: 1 });
 
-  let REDES = [], SEMANAS = [], ESPECTROS = [], MESES = [];
+  let REDES = [], SEMANAS = [], ESPECTROS = [], MESES = [], TEMAS = [];
   const CH = { likes:null, coment:null, todos:null, winners:null, winnersDelta:null };
 
   async function fetchJSON(url, fallback) {
@@ -469,13 +1593,15 @@ def index():
     }
   }
 
-  function drawChart(ctx, cfg, key){ if (CH[key]) { try { CH[key].destroy(); } catch(e){} } CH[key] = new Chart(ctx, cfg); return CH[key]; }
+  function soltarChart(key){ if (CH[key]) { try { CH[key].destroy(); } catch(e){} CH[key] = null; } }
+  function drawChart(ctx, cfg, key){ soltarChart(key); CH[key] = new Chart(ctx, cfg); return CH[key]; }
   function qs(name){ const u=new URL(window.location.href); return u.searchParams.get(name)||""; }
   function qsmulti(name){ const v=qs(name); return v? v.split(",").map(s=>s.trim()).filter(Boolean) : []; }
 
   function renderChips(containerId, items, qsParam){
     const cont = document.getElementById(containerId);
-    const sel = new Set(qsmulti(qsParam));
+    // Al redibujar (versión nueva) se conserva lo marcado aunque todavía no se haya aplicado
+    const sel = new Set(cont.querySelector('input[type=checkbox]') ? getChipValues(qsParam) : qsmulti(qsParam));
     cont.innerHTML = items.map(v => {
       const checked = sel.has(v) ? 'checked' : '';
       return `<label><input type="checkbox" name="${qsParam}" value="${v}" ${checked} /><span>${v}</span></label>`;
@@ -494,8 +1620,15 @@ def index():
   }
 
   async function bootstrap(){
+    initBuscarCandidato();
+    await cargarBoot();
+    await drawAll();
+    escucharCambios();
+  }
+
+  async function cargarBoot(){
     const boot = await fetchJSON('/api/bootstrap', { redes:[], semanas:[], meses:[], espectros:[], kpis:{ filas:0, likes:0, coment:0, candidatos:0 } });
-    REDES = boot.redes || []; SEMANAS = boot.semanas || []; MESES = boot.meses || []; ESPECTROS = boot.espectros || [];
+    REDES = boot.redes || []; SEMANAS = boot.semanas || []; MESES = boot.meses || []; ESPECTROS = boot.espectros || []; TEMAS = boot.temas || [];
     document.getElementById('kpiFilas').innerText = (boot.kpis.filas || 0).toLocaleString('es-ES');
     document.getElementById('kpiLikes').innerText = (boot.kpis.likes || 0).toLocaleString('es-ES');
     document.getElementById('kpiCom').innerText   = (boot.kpis.coment || 0).toLocaleString('es-ES');
@@ -504,23 +1637,34 @@ def index():
     renderChips('chipsEsp', ESPECTROS, 'espectro');
     renderChips('chipsSemana', SEMANAS, 'semana');
     renderChips('chipsMes', MESES, 'mes');
-    await drawAll();
+    renderChips('chipsTema', TEMAS, 'tema');
   }
 
-  async function drawAll(){
+  function paramsFiltros(){
     const params = new URLSearchParams();
     const reds = qsmulti('red'), esps = qsmulti('espectro'), weeks = qsmulti('semana'), months = qsmulti('mes');
     if(reds.length) params.set('red', reds.join(',')); if(esps.length) params.set('espectro', esps.join(','));
     if(weeks.length) params.set('semana', weeks.join(',')); if(months.length) params.set('mes', months.join(','));
+    const cands = qsmulti('candidato'); if(cands.length) params.set('candidato', cands.join(','));
+    const temas = qsmulti('tema'); if(temas.length) params.set('tema', temas.join(','));
     if(qs('semana') && !weeks.length) params.set('semana', qs('semana'));
+    return params;
+  }
 
+  async function drawAll(){
+    await dibujarBarras();
+    await dibujarSemanales();
+  }
+
+  // Barras: hoja de promedios
+  async function dibujarBarras(){
+    const params = paramsFiltros();
+    params.delete('tema');  // la hoja de promedios no tiene tema
     const likesCand = await fetchJSON('/api/likes-por-candidato?'+params.toString(), []);
     const comCand   = await fetchJSON('/api/comentarios-por-candidato?'+params.toString(), []);
     const todos     = await fetchJSON('/api/candidatos-todos?'+params.toString(), []);
-    const winners   = await fetchJSON('/api/ganador-semanal?'+params.toString(), []);
-    const winSeries = await fetchJSON('/api/ganador-semanal-series?'+params.toString(), { semanas:[], espectros:[], values:[] });
-    const matrix    = await fetchJSON('/api/heatmap?'+params.toString(), { rows:[], cols:[], values:[] });
 
+    ['likes', 'coment', 'todos'].forEach(soltarChart);
     setDynamicHeight('likesPorCandidato', likesCand.length);
     setDynamicHeight('comentPorCandidato', comCand.length);
     setDynamicHeight('candidatosTodos',   todos.length);
@@ -531,7 +1675,7 @@ def index():
     const barCfg = { barThickness: espectroOn ? 16 : 20, categoryPercentage: 0.9, barPercentage: 0.9 };
 
     // Likes
-    new Chart(document.getElementById('likesPorCandidato').getContext('2d'), {
+    drawChart(document.getElementById('likesPorCandidato').getContext('2d'), {
       type: 'bar',
       data: { labels: likesCand.map(d=>d.candidato),
               datasets: [{ label: 'Likes promedio', data: likesCand.map(d=>d.likes),
@@ -539,10 +1683,10 @@ def index():
                                              : Array.from({length:likesCand.length}, (_,i)=> ["rgba(99,102,241,0.55)","rgba(236,72,153,0.55)","rgba(34,197,94,0.55)","rgba(59,130,246,0.55)","rgba(234,179,8,0.55)","rgba(244,114,182,0.55)","rgba(16,185,129,0.55)","rgba(251,113,133,0.55)","rgba(96,165,250,0.55)","rgba(250,204,21,0.55)","rgba(147,197,253,0.55)","rgba(253,186,116,0.55)"][i % 12]),
                 ...barCfg }] },
       options: baseOpts
-    });
+    }, 'likes');
 
     // Comentarios
-    new Chart(document.getElementById('comentPorCandidato').getContext('2d'), {
+    drawChart(document.getElementById('comentPorCandidato').getContext('2d'), {
       type: 'bar',
       data: { labels: comCand.map(d=>d.candidato),
               datasets: [{ label: 'Comentarios promedio', data: comCand.map(d=>d.comentarios),
@@ -550,10 +1694,10 @@ def index():
                                             : Array.from({length:comCand.length}, (_,i)=> ["rgba(99,102,241,0.55)","rgba(236,72,153,0.55)","rgba(34,197,94,0.55)","rgba(59,130,246,0.55)","rgba(234,179,8,0.55)","rgba(244,114,182,0.55)","rgba(16,185,129,0.55)","rgba(251,113,133,0.55)","rgba(96,165,250,0.55)","rgba(250,204,21,0.55)","rgba(147,197,253,0.55)","rgba(253,186,116,0.55)"][i % 12]),
                 ...barCfg }] },
       options: baseOpts
-    });
+    }, 'coment');
 
     // Interacciones promedio/semana (tercera tarjeta)
-    new Chart(document.getElementById('candidatosTodos').getContext('2d'), {
+    drawChart(document.getElementById('candidatosTodos').getContext('2d'), {
       type: 'bar',
       data: { labels: todos.map(d=>d.candidato),
               datasets: [{ label: 'Interacciones promedio/semana', data: todos.map(d=>d.likes), // aquí "likes" = interacciones
@@ -561,7 +1705,15 @@ def index():
                                             : Array.from({length:todos.length}, (_,i)=> ["rgba(99,102,241,0.55)","rgba(236,72,153,0.55)","rgba(34,197,94,0.55)","rgba(59,130,246,0.55)","rgba(234,179,8,0.55)","rgba(244,114,182,0.55)","rgba(16,185,129,0.55)","rgba(251,113,133,0.55)","rgba(96,165,250,0.55)","rgba(250,204,21,0.55)","rgba(147,197,253,0.55)","rgba(253,186,116,0.55)"][i % 12]),
                 ...barCfg }] },
       options: baseOpts
-    });
+    }, 'todos');
+  }
+
+  // Ganadores y heatmaps: hojas semanales
+  async function dibujarSemanales(){
+    const params = paramsFiltros();
+    const winners   = await fetchJSON('/api/ganador-semanal?'+params.toString(), []);
+    const winSeries = await fetchJSON('/api/ganador-semanal-series?'+params.toString(), { semanas:[], espectros:[], values:[] });
+    const matrix    = await fetchJSON('/api/heatmap?'+params.toString(), { rows:[], cols:[], values:[] });
 
     // Ganadores (interacciones absolutas)
     const canvasStack = document.getElementById('ganadoresStack');
@@ -573,7 +1725,7 @@ def index():
       const w = winners.filter(x => x.espectro === esp).sort((a,b) => SEMANAS.indexOf(a.semana) - SEMANAS.indexOf(b.semana));
       const labels = w.map(x => { const idx = SEMANAS.indexOf(x.semana); const p = idx>=0?`S${idx+1}. `:''; return `${p}${x.candidato || 'ND'}`; });
       const data   = w.map(x => x.nd ? 0 : x.interacciones);
-      new Chart(ctxStack, {
+      drawChart(ctxStack, {
         type:'bar',
         data:{ labels, datasets:[{ label:esp, data,
           backgroundColor: ESPECTRO_COLORS[esp] || 'rgba(107,114,128,0.35)', borderColor: ESPECTRO_COLORS[esp] || 'rgba(107,114,128,0.55)',
@@ -583,7 +1735,7 @@ def index():
             title:(items)=>{const i=items[0].dataIndex; const sem=w[i]?.semana||''; return sem?`${sem}`:items[0].label; },
             label:(ctx)=> Number(ctx.raw||0).toLocaleString('es-ES', { minimumFractionDigits: 1, maximumFractionDigits: 1 })+' interacciones' } } },
           scales:{ x:{ ticks:{ maxTicksLimit:8, callback:(v)=> Number(v||0).toLocaleString('es-ES', { minimumFractionDigits: 1, maximumFractionDigits: 1 }) } }, y:{ ticks:{ autoSkip:false }, title:{ display:true, text:'Interacciones' } } } }
-      });
+      }, 'winners');
     } else {
       const stackDatasets = (winSeries.espectros || []).map(esp => ({
         label: esp,
@@ -594,12 +1746,12 @@ def index():
         backgroundColor: ESPECTRO_COLORS[esp] || 'rgba(107,114,128,0.35)', borderColor: ESPECTRO_COLORS[esp] || 'rgba(107,114,128,0.55)',
         borderWidth: 0, barThickness: 18, categoryPercentage: 0.9, barPercentage: 0.9
       }));
-      new Chart(ctxStack, {
+      drawChart(ctxStack, {
         type:'bar', data:{ labels:(winSeries.semanas||[]).map((s,i)=>'S'+(i+1)), datasets:stackDatasets },
         options:{ indexAxis:'x', responsive:false, maintainAspectRatio:false, animation:false, plugins:{ legend:{ position:'top' } },
           scales:{ x:{ stacked:true, ticks:{ autoSkip:false } }, y:{ stacked:true, title:{ display:true, text:'Interacciones (ganador por espectro)' },
             ticks:{ callback:(v)=> Number(v||0).toLocaleString('es-ES', { minimumFractionDigits: 1, maximumFractionDigits: 1 }) } } } }
-      });
+      }, 'winners');
     }
 
     // Heatmap general
@@ -627,6 +1779,8 @@ def index():
       hm.innerHTML = '<div class="heatwrap">' + html + '</div>';
     }
 
+    await dibujarTemas(params);
+    await dibujarTopPublicaciones();
     await redibujarSemanal();
     await redibujarDelta();
     await dibujarGanadoresDelta();
@@ -640,11 +1794,15 @@ def index():
     if(esps.length) u.searchParams.set('espectro', esps.join(',')); else u.searchParams.delete('espectro');
     if(weeks.length) u.searchParams.set('semana', weeks.join(',')); else u.searchParams.delete('semana');
     if(months.length) u.searchParams.set('mes', months.join(',')); else u.searchParams.delete('mes');
+    const cands = document.getElementById('inpCand').value.split(',').map(s=>s.trim()).filter(Boolean);
+    if(cands.length) u.searchParams.set('candidato', cands.join(',')); else u.searchParams.delete('candidato');
+    const temas = getChipValues('tema');
+    if(temas.length) u.searchParams.set('tema', temas.join(',')); else u.searchParams.delete('tema');
     window.location.href = u.toString();
   }
   function limpiar(){
     const u=new URL(window.location.href);
-    ['red','semana','mes','espectro'].forEach(p=>u.searchParams.delete(p));
+    ['red','semana','mes','espectro','candidato','tema'].forEach(p=>u.searchParams.delete(p));
     window.location.href=u.toString();
   }
 
@@ -654,6 +1812,8 @@ def index():
     const reds = qsmulti('red'), esps = qsmulti('espectro'), weeks = qsmulti('semana'), months = qsmulti('mes');
     if(reds.length) params.set('red', reds.join(',')); if(esps.length) params.set('espectro', esps.join(','));
     if(weeks.length) params.set('semana', weeks.join(',')); if(months.length) params.set('mes', months.join(','));
+    const cands = qsmulti('candidato'); if(cands.length) params.set('candidato', cands.join(','));
+    const temas = qsmulti('tema'); if(temas.length) params.set('tema', temas.join(','));
     params.set('metric', metric);
 
     const m = await fetchJSON('/api/heatmap-semanal?'+params.toString(), { rows:[], cols:[], values:[] });
@@ -691,6 +1851,8 @@ def index():
     const reds = qsmulti('red'), esps = qsmulti('espectro'), weeks = qsmulti('semana'), months = qsmulti('mes');
     if(reds.length) params.set('red', reds.join(',')); if(esps.length) params.set('espectro', esps.join(','));
     if(weeks.length) params.set('semana', weeks.join(',')); if(months.length) params.set('mes', months.join(','));
+    const cands = qsmulti('candidato'); if(cands.length) params.set('candidato', cands.join(','));
+    const temas = qsmulti('tema'); if(temas.length) params.set('tema', temas.join(','));
     params.set('metric', metric);
 
     const m = await fetchJSON('/api/variacion-semanal?'+params.toString(), { rows:[], cols:[], values:[] });
@@ -735,6 +1897,8 @@ def index():
     const reds = qsmulti('red'), esps = qsmulti('espectro'), weeks = qsmulti('semana'), months = qsmulti('mes');
     if(reds.length) params.set('red', reds.join(',')); if(esps.length) params.set('espectro', esps.join(','));
     if(weeks.length) params.set('semana', weeks.join(',')); if(months.length) params.set('mes', months.join(','));
+    const cands = qsmulti('candidato'); if(cands.length) params.set('candidato', cands.join(','));
+    const temas = qsmulti('tema'); if(temas.length) params.set('tema', temas.join(','));
 
     const winnersD   = await fetchJSON('/api/ganador-variacion?'+params.toString(), []);
     const winDSeries = await fetchJSON('/api/ganador-variacion-series?'+params.toString(), { semanas:[], espectros:[], values:[] });
@@ -777,6 +1941,74 @@ def index():
     }
   }
 
+  // Actualización en vivo: long-poll de /api/version; solo se redibujan los paneles cuya fuente cambió
+  const dormir = (ms) => new Promise(r => setTimeout(r, ms));
+  let VERSION = null, FUENTES = {};
+  async function escucharCambios(){
+    for(;;){
+      const r = await fetchJSON('/api/version?espera=1' + (VERSION ? '&v='+encodeURIComponent(VERSION) : ''), null);
+      if(!r){ await dormir(30000); continue; }
+      if(VERSION && r.version !== VERSION){
+        const f = r.fuentes || {};
+        if(f.semanal !== FUENTES.semanal){ await cargarBoot(); await dibujarSemanales(); }
+        if(f.promedios !== FUENTES.promedios){ await dibujarBarras(); }
+      }
+      VERSION = r.version; FUENTES = r.fuentes || {};
+      if(r.reintentar) await dormir(r.reintentar * 1000);
+    }
+  }
+
+  async function dibujarTemas(params){
+    const r = await fetchJSON('/api/temas?'+params.toString(), { temas:[] });
+    const el = document.getElementById('temas');
+    if(!r.temas || !r.temas.length){ el.innerHTML = '<em>Sin datos.</em>'; return; }
+    const max = Math.max(...r.temas.map(t=>t.total||0), 0);
+    let html = '<table><thead><tr><th>Tema</th><th>Filas</th><th>Total</th><th>Promedio</th><th>Espectro líder</th><th>Candidatos líderes</th></tr></thead><tbody>';
+    for (const t of r.temas) {
+      const pct = max ? (t.total||0)/max : 0;
+      const esp = (t.espectros||[])[0];
+      const cands = (t.candidatos||[]).slice(0,3).map(c => `${c.candidato} (${f1(c.total)})`).join(', ');
+      html += `<tr><th>${t.tema}</th><td>${t.filas}</td><td class="cell" style="background:rgba(16,185,129,${0.08 + 0.6*pct})">${f1(t.total)}</td>`
+            + `<td>${f1(t.promedio)}</td><td>${esp ? esp.espectro : ''}</td><td>${cands}</td></tr>`;
+    }
+    el.innerHTML = '<div class="heatwrap">' + html + '</tbody></table></div>';
+  }
+
+  async function dibujarTopPublicaciones(){
+    const params = paramsFiltros();
+    const por = document.getElementById('selTopPor').value;
+    if(por) params.set('por', por);
+    params.set('k', por ? '5' : '10');
+    const r = await fetchJSON('/api/top-publicaciones?'+params.toString(), { grupos:[] });
+    const el = document.getElementById('topPublicaciones');
+    if(!r.grupos || !r.grupos.length){ el.innerHTML = '<em>Sin datos.</em>'; return; }
+    let html = '<table><thead><tr><th>#</th><th>Likes</th><th>Candidato</th><th>Red</th><th>Semana</th><th>Tema</th></tr></thead><tbody>';
+    for (const g of r.grupos) {
+      if (por) html += `<tr><th colspan="6" style="text-align:left">${g.grupo || 'Sin espectro'}</th></tr>`;
+      g.publicaciones.forEach((p, i) => {
+        html += `<tr><td>${i+1}</td><td>${Number(p.likes||0).toLocaleString('es-ES')}</td><td>${p.candidato}</td>`
+              + `<td>${p.red}</td><td>${p.semana}</td><td style="text-align:left">${p.tema || ''}</td></tr>`;
+      });
+    }
+    el.innerHTML = '<div class="heatwrap">' + html + '</tbody></table></div>';
+  }
+
+  // Autocompletado de candidatos: sugiere sobre el último nombre escrito
+  function initBuscarCandidato(){
+    const inp = document.getElementById('inpCand'), dl = document.getElementById('dlCand');
+    inp.value = qsmulti('candidato').join(', ');
+    let ultimo = '';
+    inp.addEventListener('input', async () => {
+      const partes = inp.value.split(','), q = partes.pop().trim();
+      if(!q || q === ultimo) return;
+      ultimo = q;
+      const res = await fetchJSON('/api/candidatos/buscar?q='+encodeURIComponent(q), []);
+      const previo = partes.map(s=>s.trim()).filter(Boolean);
+      const prefijo = previo.length ? previo.join(', ') + ', ' : '';
+      dl.innerHTML = res.map(r => `<option value="${prefijo}${r.candidato}">${r.espectro || ''}</option>`).join('');
+    });
+  }
+
   // Helpers del front
   function getChipValues(name){ return Array.from(document.querySelectorAll('input[type=checkbox][name="'+name+'"]:checked')).map(i=>i.value); }
 
@@ -787,16 +2019,322 @@ def index():
 '''
     return render_template_string(template, espectro_colors=espectro_colors)
 
+# ---------- Cache de respuestas de la API ----------
+_RESPONSE_CACHE = OrderedDict()
+_RESPONSE_CACHE_LOCK = threading.Lock()
+
+def _query_key():
+    """Ruta + query normalizada (orden de parámetros irrelevante)."""
+    return (request.path, tuple(sorted(request.args.items(multi=True))))
+
+def cached_response(view):
+    """LRU en memoria de respuestas 200 por ruta/query y snapshot (luego disco), con single-flight en los misses."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if getattr(flask_g, "_prof_cprofile", None) is not None:
+            return view(*args, **kwargs)  # perfil forzado: medir el cálculo, no el hit de cache
+        key = (_cache_key(),) + _query_key()
+        with _RESPONSE_CACHE_LOCK:
+            hit = _RESPONSE_CACHE.get(key)
+            if hit is not None:
+                _RESPONSE_CACHE.move_to_end(key)
+        if hit is not None:
+            body, mimetype, headers = hit
+            return app.response_class(body, mimetype=mimetype, headers=headers)
+        # Misses idénticos concurrentes: uno calcula (o lee del disco), el resto comparte el cuerpo serializado
+        body, status, mimetype, headers = coalesce(key, lambda: _disco_o_calcular(view, args, kwargs))
+        if status == 200 and RESPONSE_CACHE_SIZE > 0:
+            with _RESPONSE_CACHE_LOCK:
+                _RESPONSE_CACHE[key] = (body, mimetype, headers)
+                while len(_RESPONSE_CACHE) > RESPONSE_CACHE_SIZE:
+                    _RESPONSE_CACHE.popitem(last=False)
+        return app.response_class(body, status=status, mimetype=mimetype, headers=headers)
+    return wrapper
+
+def _serializar(rv):
+    resp = app.make_response(rv)
+    headers = [(k, v) for k, v in resp.headers.items() if k not in {"Content-Type", "Content-Length"}]
+    return resp.get_data(), resp.status_code, resp.mimetype, headers
+
+def _respuesta_barata():
+    """
+    True si la respuesta ya está en cache (memoria o disco). Una que se está calculando
+    no cuenta: el seguidor bloquea un hilo hasta que termine el líder, así que pasa por
+    la admisión como cualquier pesado.
+    """
+    key = (_cache_key(),) + _query_key()
+    with _RESPONSE_CACHE_LOCK:
+        if key in _RESPONSE_CACHE:
+            return True
+    return _DISCO is not None and _DISCO.contiene(_clave_disco()[1])
+
+# ---------- Cache de respuestas en disco ----------
+with open(os.path.abspath(__file__), "rb") as _fh:
+    _HUELLA_CODIGO = hashlib.sha256(_fh.read()).hexdigest()  # un deploy con otro código no reusa respuestas
+
+def _archivos_fuente(kind, path):
+    if not os.path.exists(path):
+        return []
+    if kind == "dir":
+        return list(_dir_archivos(path).values())
+    return [path]
+
+@single_flight
+@lru_cache(maxsize=1)
+def _huella_fuente(_key):
+    """sha256 del contenido de la fuente sin parsearla; una vez por proceso, igual que el snapshot."""
+    h = hashlib.sha256()
+    for fpath in _archivos_fuente(*_key):
+        h.update(os.path.basename(fpath).encode("utf-8") + b"\0")
+        with open(fpath, "rb") as fh:
+            for bloque in iter(lambda: fh.read(1 << 20), b""):
+                h.update(bloque)
+    return h.hexdigest()
+
+def _huella_contenido():
+    # La configuración que cambia las respuestas va en la clave junto al snapshot
+    return _huella_contenido_cached(_cache_key(), LEADERBOARD_K_MAX, QUERY_ENGINE, TEMAS_PATH)
+
+@single_flight
+@lru_cache(maxsize=1)
+def _huella_contenido_cached(_key, k_max, motor, temas_path):
+    """
+    Identidad de lo que sirve la API: código + configuración de salida (top-k máximo,
+    motor y diccionario de temas) + fuente + lotes de ingesta. Una vez por snapshot.
+    """
+    config = json.dumps({"k_max": k_max, "motor": motor, "temas": _temas_dict()}, sort_keys=True)
+    partes = (_HUELLA_CODIGO, config, _huella_fuente(_source_key()), _INGESTA.huella)
+    return hashlib.sha256("\0".join(partes).encode("utf-8")).hexdigest()
+
+def _clave_disco():
+    """(huella de contenido, clave) de la respuesta pedida: no depende de rutas ni de pids."""
+    version = _huella_contenido()
+    path, query = _query_key()
+    clave = hashlib.sha256(json.dumps([version, path, query], ensure_ascii=False).encode("utf-8")).hexdigest()
+    return version, clave
+
+class _CacheDisco:
+    """
+    Respuestas serializadas en un SQLite local. Modo WAL: los workers leen en
+    paralelo y escriben de a uno (busy_timeout). Tope de bytes con expulsión por
+    último acceso (aproximado: el acceso se actualiza como mucho cada TOQUE_S).
+    El total de bytes lo llevan triggers en la tabla uso, así un put no suma la tabla.
+    """
+    TOQUE_S = 60
+
+    def __init__(self, path, max_bytes):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()  # una conexión por hilo y por proceso (no cruzar un fork)
+        self._avisado = False
+
+    def _con(self):
+        con = getattr(self._local, "con", None)
+        if con is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            con = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            con.execute("PRAGMA auto_vacuum=INCREMENTAL")  # solo aplica al crear el archivo
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            con.execute("BEGIN IMMEDIATE")  # dos workers creando el esquema a la vez
+            try:
+                con.execute("CREATE TABLE IF NOT EXISTS respuestas (clave TEXT PRIMARY KEY, version TEXT NOT NULL, "
+                            "cuerpo BLOB NOT NULL, mimetype TEXT, headers TEXT, bytes INTEGER NOT NULL, acceso REAL NOT NULL)")
+                con.execute("CREATE INDEX IF NOT EXISTS ix_respuestas_acceso ON respuestas (acceso)")
+                con.execute("CREATE INDEX IF NOT EXISTS ix_respuestas_version ON respuestas (version)")
+                con.execute("CREATE TABLE IF NOT EXISTS uso (id INTEGER PRIMARY KEY CHECK (id = 1), bytes INTEGER NOT NULL)")
+                # Archivos de antes del contador: se suma una única vez
+                con.execute("INSERT OR IGNORE INTO uso SELECT 1, COALESCE(SUM(bytes), 0) FROM respuestas")
+                con.execute("CREATE TRIGGER IF NOT EXISTS tr_uso_alta AFTER INSERT ON respuestas "
+                            "BEGIN UPDATE uso SET bytes = bytes + NEW.bytes; END")
+                con.execute("CREATE TRIGGER IF NOT EXISTS tr_uso_baja AFTER DELETE ON respuestas "
+                            "BEGIN UPDATE uso SET bytes = bytes - OLD.bytes; END")
+                con.execute("CREATE TRIGGER IF NOT EXISTS tr_uso_cambio AFTER UPDATE OF bytes ON respuestas "
+                            "BEGIN UPDATE uso SET bytes = bytes + NEW.bytes - OLD.bytes; END")
+                con.execute("COMMIT")
+            except BaseException:
+                con.execute("ROLLBACK")
+                raise
+            self._local.con, self._local.pid = con, os.getpid()
+        return con
+
+    def _fallo(self):
+        # La cache en disco es opcional: ante un error se sigue solo con la de memoria
+        if not self._avisado:
+            self._avisado = True
+            app.logger.exception("Cache en disco %s no disponible", self.path)
+
+    def get(self, clave):
+        try:
+            con = self._con()
+            row = con.execute("SELECT cuerpo, mimetype, headers, acceso FROM respuestas WHERE clave = ?",
+                              (clave,)).fetchone()
+            if row is None:
+                return None
+            ahora = time.time()
+            if ahora - row[3] > self.TOQUE_S:
+                con.execute("UPDATE respuestas SET acceso = ? WHERE clave = ?", (ahora, clave))
+            return bytes(row[0]), row[1], [tuple(h) for h in json.loads(row[2])]
+        except sqlite3.Error:
+            self._fallo()
+            return None
+
+    def contiene(self, clave):
+        try:
+            return self._con().execute("SELECT 1 FROM respuestas WHERE clave = ?", (clave,)).fetchone() is not None
+        except sqlite3.Error:
+            self._fallo()
+            return False
+
+    def tiene_version(self, version):
+        try:
+            return self._con().execute("SELECT 1 FROM respuestas WHERE version = ? LIMIT 1",
+                                       (version,)).fetchone() is not None
+        except sqlite3.Error:
+            self._fallo()
+            return False
+
+    def put(self, clave, version, body, mimetype, headers):
+        if len(body) > self.max_bytes:
+            return
+        try:
+            con = self._con()
+            con.execute("BEGIN IMMEDIATE")
+            try:
+                # Upsert (no INSERT OR REPLACE: el borrado implícito no dispara tr_uso_baja)
+                con.execute("INSERT INTO respuestas VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT (clave) DO UPDATE SET "
+                            "version = excluded.version, cuerpo = excluded.cuerpo, mimetype = excluded.mimetype, "
+                            "headers = excluded.headers, bytes = excluded.bytes, acceso = excluded.acceso",
+                            (clave, version, body, mimetype, json.dumps(headers), len(body), time.time()))
+                total = con.execute("SELECT bytes FROM uso").fetchone()[0]
+                expulsadas = self._expulsar(con, total) if total > self.max_bytes else 0
+                con.execute("COMMIT")
+            except BaseException:
+                con.execute("ROLLBACK")
+                raise
+            if expulsadas:
+                con.execute("PRAGMA incremental_vacuum")
+        except sqlite3.Error:
+            self._fallo()
+
+    def _expulsar(self, con, total):
+        """Borra las de acceso más antiguo hasta el 90% del tope (así no se expulsa en cada put)."""
+        objetivo = self.max_bytes * 0.9
+        borrar = []
+        for clave, n in con.execute("SELECT clave, bytes FROM respuestas ORDER BY acceso").fetchall():
+            if total <= objetivo:
+                break
+            borrar.append((clave,))
+            total -= n
+        con.executemany("DELETE FROM respuestas WHERE clave = ?", borrar)
+        return len(borrar)
+
+_DISCO = _CacheDisco(DISK_CACHE_PATH, int(DISK_CACHE_MAX_MB * 1024 * 1024)) if DISK_CACHE_PATH else None
+
+def _disco_o_calcular(view, args, kwargs):
+    """Miss en memoria: primero la cache en disco (otro worker o un proceso anterior), luego la vista."""
+    if _DISCO is None:
+        return _serializar(view(*args, **kwargs))
+    version, clave = _clave_disco()
+    hit = _DISCO.get(clave)
+    if hit is not None:
+        body, mimetype, headers = hit
+        return body, 200, mimetype, headers
+    body, status, mimetype, headers = _serializar(view(*args, **kwargs))
+    if status == 200:
+        _DISCO.put(clave, version, body, mimetype, headers)
+    return body, status, mimetype, headers
+
+# ---------- Control de admisión / load shedding ----------
+# Fuera de la admisión: health/ready, la página y /api/version (tiene su propio tope de hilos)
+_ADMISSION_EXENTAS = {"/api/version"}
+_ADMISSION_GLOBAL = threading.BoundedSemaphore(max(ADMISSION_SLOTS, 1))
+# Hilos que pueden ocupar pesados y long-polls; los ADMISSION_RESERVED restantes no se tocan
+_CARRIL_GENERAL = threading.BoundedSemaphore(max(WEB_THREADS - ADMISSION_RESERVED, 1))
+_ADMISSION_RUTAS = {}
+_ADMISSION_LOCK = threading.Lock()
+_ADMISSION_ESPERANDO = 0
+
+def _semaforo_ruta(path):
+    with _ADMISSION_LOCK:
+        sem = _ADMISSION_RUTAS.get(path)
+        if sem is None:
+            sem = _ADMISSION_RUTAS[path] = threading.BoundedSemaphore(max(ADMISSION_ROUTES.get(path, ADMISSION_SLOTS), 1))
+        return sem
+
+def _sobrecarga():
+    return (jsonify({"error": "Servidor ocupado, reintenta en unos segundos"}), 503,
+            {"Retry-After": str(ADMISSION_RETRY_S), "Cache-Control": "no-store"})
+
+@app.before_request
+def _admision():
+    global _ADMISSION_ESPERANDO
+    if not ADMISSION_ENABLED or not request.path.startswith("/api/") or request.path in _ADMISSION_EXENTAS:
+        return None
+    if request.method == "GET" and _respuesta_barata():
+        return None
+    if not _CARRIL_GENERAL.acquire(blocking=False):
+        return _sobrecarga()
+    ruta, total = _semaforo_ruta(request.path), _ADMISSION_GLOBAL
+    # Camino rápido: hay slot libre (sin contar como espera)
+    if ruta.acquire(blocking=False):
+        if total.acquire(blocking=False):
+            flask_g._admision = (ruta, total, _CARRIL_GENERAL)
+            return None
+        ruta.release()
+    with _ADMISSION_LOCK:
+        if _ADMISSION_ESPERANDO >= ADMISSION_QUEUE:
+            _CARRIL_GENERAL.release()
+            return _sobrecarga()
+        _ADMISSION_ESPERANDO += 1
+    try:
+        limite = time.monotonic() + ADMISSION_MAX_WAIT_MS / 1000.0
+        if not ruta.acquire(timeout=max(limite - time.monotonic(), 0)):
+            _CARRIL_GENERAL.release()
+            return _sobrecarga()
+        if not total.acquire(timeout=max(limite - time.monotonic(), 0)):
+            ruta.release()
+            _CARRIL_GENERAL.release()
+            return _sobrecarga()
+        flask_g._admision = (ruta, total, _CARRIL_GENERAL)
+        return None
+    finally:
+        with _ADMISSION_LOCK:
+            _ADMISSION_ESPERANDO -= 1
+
+def _liberar(slots):
+    for sem in slots:
+        sem.release()
+
+@app.after_request
+def _admision_al_cerrar(resp):
+    # Un cuerpo en streaming (/api/export) se genera después de este punto: su slot
+    # se suelta cuando el servidor cierra la respuesta, no al terminar la vista
+    slots = flask_g.pop("_admision", None)
+    if slots and resp.is_streamed:
+        resp.call_on_close(lambda: _liberar(slots))
+    elif slots:
+        _liberar(slots)
+    return resp
+
+@app.teardown_request
+def _admision_fin(_exc):
+    # Solo si no se llegó a armar la respuesta (excepción sin manejar)
+    slots = flask_g.pop("_admision", None)
+    if slots:
+        _liberar(slots)
+
 # ---------- Catch-all seguro (sirve el dashboard para rutas no API/health) ----------
 @app.route("/<path:subpath>", methods=["GET", "HEAD"])
 def catch_all(subpath):
     sp = subpath.strip().lower()
-    if sp.startswith("api/") or sp in {"health", "healthz", "healthcheck"}:
+    if sp.startswith("api/") or sp in {"health", "healthz", "healthcheck", "ready"}:
         return ("Not found", 404)
     return index()
 
 # ================== APIs ==================
 @app.route("/api/bootstrap")
+@cached_response
 def api_bootstrap():
     df = load_all()
     redes     = sorted(df[COL_RED].dropna().unique().tolist()) if not df.empty else []
@@ -829,188 +2367,500 @@ def api_bootstrap():
         "coment": int(df[COL_COMENT].fillna(0).sum()) if COL_COMENT in df else 0,
         "candidatos": df[COL_CANDIDATO].nunique() if not df.empty else 0
     }
-    return jsonify({"redes": redes, "semanas": semanas, "meses": meses, "espectros": espectros, "kpis": kpis})
+    temas = [t for t, filas in _indice_temas_cached(_cache_key())[2].items() if len(filas)]
+    return jsonify({"redes": redes, "semanas": semanas, "meses": meses, "espectros": espectros, "temas": temas, "kpis": kpis})
 
 # === BARRAS usando HOJA DE PROMEDIOS ===
 @app.route("/api/likes-por-candidato")
+@cached_response
 def api_likes_por_candidato():
-    df = aplicar_filtros_prom(load_promedios())
-    if df.empty or PROM_COL_LIKES not in df.columns:
-        return jsonify([])
-    x = df[[PROM_COL_CANDIDATO, PROM_COL_ESPECTRO, PROM_COL_LIKES]].copy()
-    x = x[pd.to_numeric(x[PROM_COL_LIKES], errors="coerce").notna()]
-    g = (x.groupby(PROM_COL_CANDIDATO, as_index=False)
-           .agg({PROM_COL_LIKES: "mean", PROM_COL_ESPECTRO: lambda s: s.mode().iat[0] if not s.mode().empty else s.dropna().iat[0] if s.dropna().size else None})
-           .rename(columns={PROM_COL_LIKES: "likes", PROM_COL_CANDIDATO: "candidato", PROM_COL_ESPECTRO: "espectro"})
-           .sort_values("likes", ascending=False))
-    out = [{"candidato": r["candidato"], "espectro": r["espectro"], "likes": _r1(r["likes"])} for _, r in g.iterrows()]
-    return jsonify(out)
+    return _barras_por_candidato(PROM_COL_LIKES, "likes")
 
 @app.route("/api/comentarios-por-candidato")
+@cached_response
 def api_comentarios_por_candidato():
-    df = aplicar_filtros_prom(load_promedios())
-    if df.empty or PROM_COL_COMENT not in df.columns:
-        return jsonify([])
-    x = df[[PROM_COL_CANDIDATO, PROM_COL_ESPECTRO, PROM_COL_COMENT]].copy()
-    x = x[pd.to_numeric(x[PROM_COL_COMENT], errors="coerce").notna()]
-    g = (x.groupby(PROM_COL_CANDIDATO, as_index=False)
-           .agg({PROM_COL_COMENT: "mean", PROM_COL_ESPECTRO: lambda s: s.mode().iat[0] if not s.mode().empty else s.dropna().iat[0] if s.dropna().size else None})
-           .rename(columns={PROM_COL_COMENT: "comentarios", PROM_COL_CANDIDATO: "candidato", PROM_COL_ESPECTRO: "espectro"})
-           .sort_values("comentarios", ascending=False))
-    out = [{"candidato": r["candidato"], "espectro": r["espectro"], "comentarios": _r1(r["comentarios"])} for _, r in g.iterrows()]
-    return jsonify(out)
+    return _barras_por_candidato(PROM_COL_COMENT, "comentarios")
 
 @app.route("/api/candidatos-todos")
+@cached_response
 def api_candidatos_todos():
-    df = aplicar_filtros_prom(load_promedios())
-    if df.empty or PROM_COL_INTERSEM not in df.columns:
-        return jsonify([])
-    x = df[[PROM_COL_CANDIDATO, PROM_COL_ESPECTRO, PROM_COL_INTERSEM]].copy()
-    x = x[pd.to_numeric(x[PROM_COL_INTERSEM], errors="coerce").notna()]
-    g = (x.groupby(PROM_COL_CANDIDATO, as_index=False)
-           .agg({PROM_COL_INTERSEM: "mean", PROM_COL_ESPECTRO: lambda s: s.mode().iat[0] if not s.mode().empty else s.dropna().iat[0] if s.dropna().size else None})
-           .rename(columns={PROM_COL_INTERSEM: "interacciones", PROM_COL_CANDIDATO: "candidato", PROM_COL_ESPECTRO: "espectro"})
-           .sort_values("interacciones", ascending=False))
     # Reutilizamos la clave "likes" en el front; aquí contiene interacciones promedio/semana
-    out = [{"candidato": r["candidato"], "espectro": r["espectro"], "likes": _r1(r["interacciones"])} for _, r in g.iterrows()]
-    return jsonify(out)
+    return _barras_por_candidato(PROM_COL_INTERSEM, "likes")
+
+# === Motor de consultas sobre las hojas semanales (pandas o SQLite embebido) ===
+def _ganadores(g, col):
+    """Mayor promedio por (semana, espectro) de las medias g (ordenadas por candidato: empate -> alfabético)."""
+    g = g[g[col].notna()]
+    if g.empty:
+        return {}
+    best = g.loc[g.groupby(["Semana", COL_ESPECTRO], observed=True)[col].idxmax()]
+    return {(s, e): (c, v) for s, e, c, v in zip(best["Semana"], best[COL_ESPECTRO], best[COL_CANDIDATO], best[col])}
+
+class _ConsultaPandas:
+    """Hojas semanales filtradas con aplicar_filtros y agregadas con pandas."""
+    def __init__(self):
+        self.df = aplicar_filtros(load_all())
+
+    def vacia(self):
+        return self.df.empty
+
+    def _sub(self, candidatos):
+        return self.df if candidatos is None else self.df[self.df[COL_CANDIDATO].isin(candidatos)]
+
+    def distintos(self, col, candidatos=None):
+        return self._sub(candidatos)[col].dropna().unique().tolist()
+
+    def media(self, keys, col, candidatos=None):
+        return self._sub(candidatos).groupby(keys, as_index=False, observed=True)[col].mean()
+
+    def ganadores(self, col):
+        """{(semana, espectro): (candidato, valor)} del mayor promedio de 'col' (empate -> alfabético)."""
+        g = self.df.groupby(["Semana", COL_ESPECTRO, COL_CANDIDATO], as_index=False, observed=True)[col].mean()
+        return _ganadores(g, col)
+
+    def deltas(self, col, weeks):
+        """Matriz (candidato, espectro) × semana con Δ respecto a la semana previa."""
+        g = (self.df.groupby([COL_CANDIDATO, COL_ESPECTRO, "Semana"], as_index=False, observed=True)[col].mean())
+        wide = g.pivot_table(index=[COL_CANDIDATO, COL_ESPECTRO], columns="Semana", values=col, observed=True)
+        # asegurar columnas
+        for w in weeks:
+            if w not in wide.columns:
+                wide[w] = pd.NA
+        return wide[weeks].diff(axis=1)  # Δ(Sn - S(n-1))
+
+# Columnas de la tabla SQL (identificadores simples) <- columnas del DataFrame
+_SQL_COLS = {
+    COL_CANDIDATO: "candidato", COL_ESPECTRO: "espectro", COL_RED: "red", "Semana": "semana",
+    COL_LIKES: "likes", COL_COMENT: "comentarios", "Interacciones": "interacciones",
+}
+
+def _sql_tabla(df):
+    t = pd.DataFrame({sql: (df[c] if c in df.columns else np.nan) for c, sql in _SQL_COLS.items()})
+    # Mismas comparaciones que aplicar_filtros (astype(str).str.lower(), incluido None -> 'none')
+    t["red_lc"] = df[COL_RED].astype(str).str.lower()
+    t["espectro_lc"] = df[COL_ESPECTRO].astype(str).str.lower()
+    t["fila"] = df.index.to_numpy()  # mismos ids que el índice invertido de temas
+    return t
+
+def _sql_archivo_nuevo():
+    fd, path = tempfile.mkstemp(prefix="dashboard-", suffix=".sqlite")
+    os.close(fd)
+    # El anterior se conserva (puede haber hilos abriéndolo todavía); los más viejos se borran.
+    # Solo los de este proceso: con --preload el del master lo siguen usando los demás workers
+    pid = os.getpid()
+    propios = [e for e in _SQL_ARCHIVOS if e[0] == pid]
+    for viejo in propios[:-1]:
+        _SQL_ARCHIVOS.remove(viejo)
+        _borrar_archivo(viejo[1])
+    _SQL_ARCHIVOS.append((pid, path))
+    return path
+
+def _extender_sql(prev, nuevas):
+    """
+    Los archivos publicados no se tocan (immutable=1): copia del anterior con la API
+    de backup y solo las filas nuevas insertadas; los índices se mantienen solos.
+    """
+    path = _sql_archivo_nuevo()
+    with closing(_sqlite_solo_lectura(prev)) as origen, closing(sqlite3.connect(path)) as con:
+        origen.backup(con)
+        _sql_tabla(nuevas).to_sql("semanal", con, index=False, if_exists="append")
+        con.commit()
+    return path
+
+@single_flight
+@lru_cache(maxsize=1)
+@incremental(_extender_sql)
+def _sql_db_cached(_key):
+    """
+    Snapshot limpio en un archivo SQLite temporal, uno por snapshot; no se vuelve a
+    escribir, así que cada hilo lo abre en su propia conexión de solo lectura (ver
+    _sql_conexion) y todas comparten las mismas páginas (mmap / page cache).
+    """
+    path = _sql_archivo_nuevo()
+    with closing(sqlite3.connect(path)) as con:
+        _sql_tabla(load_all()).to_sql("semanal", con, index=False)
+        # Índices cubrientes, uno por agrupación: GROUP BY sin ordenar y sin leer la tabla
+        cubre = "red_lc, espectro_lc, interacciones, likes, comentarios"
+        for nombre, claves in _SQL_INDICES.items():
+            con.execute(f"CREATE INDEX ix_{nombre} ON semanal ({claves}, {cubre})")
+        con.execute("ANALYZE")
+        con.commit()
+    return path
+
+_SQL_INDICES = {
+    "cand_sem": "candidato, semana",            # heatmap semanal, ranking
+    "cand_red": "candidato, red",               # heatmap por red
+    "sem_esp_cand": "semana, espectro, candidato",  # ganadores
+    "cand_esp_sem": "candidato, espectro, semana",  # variaciones
+}
+_SQL_ARCHIVOS = []  # (pid, ruta) de las bases creadas por este proceso
+
+def _borrar_archivo(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+@atexit.register
+def _sql_limpiar():
+    # Con --preload los workers heredan la lista: solo el proceso que creó el archivo lo borra
+    for pid, path in _SQL_ARCHIVOS:
+        if pid == os.getpid():
+            _borrar_archivo(path)
+
+_SQL_LOCAL = threading.local()
+
+def _sql_conexion():
+    """
+    Conexión de solo lectura del hilo actual al snapshot vigente: sin lock global,
+    las consultas de distintos hilos corren en paralelo (sqlite3 suelta el GIL).
+    Se reabre si cambia el snapshot o el proceso (una conexión no debe cruzar un fork).
+    """
+    key = _cache_key()
+    if getattr(_SQL_LOCAL, "key", None) != (key, os.getpid()):
+        # immutable=1: el archivo no cambia nunca, así que SQLite no toma locks al leer
+        path = urllib.parse.quote(_sql_db_cached(key))
+        con = sqlite3.connect(f"file:{path}?mode=ro&immutable=1", uri=True)
+        con.execute("PRAGMA mmap_size = 268435456")
+        con.create_aggregate("suma_kahan", 2, _SumaKahan)
+        _SQL_LOCAL.con, _SQL_LOCAL.key = con, (key, os.getpid())
+    return _SQL_LOCAL.con
+
+class _SumaKahan:
+    """
+    Agregado suma_kahan(fila, valor): la suma compensada de groupby().mean() de pandas,
+    en el mismo orden (por fila), para que SUM/COUNT dé el mismo double que pandas.
+    """
+    def __init__(self):
+        self.pares = []
+
+    def step(self, fila, valor):
+        if valor is not None:
+            self.pares.append((fila, valor))
+
+    def finalize(self):
+        if not self.pares:
+            return None
+        suma = comp = 0.0
+        for _, v in sorted(self.pares):
+            y = v - comp
+            t = suma + y
+            comp = t - suma - y
+            if comp != comp:  # ±inf: pandas reinicia la compensación para no devolver NaN
+                comp = 0.0
+            suma = t
+        return suma
+
+def _qmarks(n):
+    return ", ".join("?" * n)
+
+def _filtros_sql():
+    """aplicar_filtros como cláusula WHERE parametrizada. Devuelve (sql, params)."""
+    red_multi      = _parse_multi((request.args.get("red") or "").strip())
+    semana_multi   = _parse_multi((request.args.get("semana") or "").strip())
+    espectro_multi = _parse_multi((request.args.get("espectro") or "").strip())
+    mes_multi      = _parse_multi((request.args.get("mes") or "").strip())
+
+    where, params = [], []
+    if red_multi:
+        reds = sorted({r.lower() for r in red_multi})
+        where.append(f"red_lc IN ({_qmarks(len(reds))})")
+        params += reds
+    if semana_multi:
+        semanas_norm = [_normalize_week_strict(s) for s in semana_multi]
+        where.append(f"semana IN ({_qmarks(len(semanas_norm))})")
+        params += semanas_norm
+    if espectro_multi:
+        esps = sorted({e.lower() for e in espectro_multi})
+        where.append(f"espectro_lc IN ({_qmarks(len(esps))})")
+        params += esps
+    if mes_multi:
+        abrev = _month_abbrev_list(mes_multi)
+        if abrev:
+            # INSTR distingue mayúsculas, como 'a in s' en Python (LIKE no)
+            where.append("(" + " OR ".join("INSTR(semana, ?) > 0" for _ in abrev) + ")")
+            params += abrev
+    candidatos = _candidatos_param()
+    if candidatos is not None:
+        where.append(f"candidato IN ({_qmarks(len(candidatos))})" if candidatos else "0")
+        params += candidatos
+    filas_tema = _temas_param()
+    if filas_tema is not None:
+        # Un solo parámetro aunque el tema cubra miles de filas
+        where.append("fila IN (SELECT value FROM json_each(?))")
+        params.append(json.dumps(filas_tema.tolist()))
+    return " AND ".join(where) or "1", params
+
+class _ConsultaSQL:
+    """
+    Misma interfaz que _ConsultaPandas, resuelta con consultas SQL parametrizadas.
+    Las medias salen de suma_kahan/COUNT (no AVG, que suma sin compensar), así que
+    coinciden bit a bit con las de pandas y las respuestas son idénticas.
+    """
+    def __init__(self):
+        self.con = _sql_conexion()
+        self.where, self.params = _filtros_sql()
+
+    def _q(self, sql, params):
+        # sqlite3 reutiliza los statements preparados (cache por conexión); columnas -> DataFrame
+        # sin la inferencia fila a fila de read_sql_query
+        cur = self.con.execute(sql, params)
+        cols = [d[0] for d in cur.description]
+        filas = cur.fetchall()
+        return pd.DataFrame({c: [f[i] for f in filas] for i, c in enumerate(cols)}, columns=cols)
+
+    def _filtro(self, candidatos):
+        if candidatos is None:
+            return self.where, list(self.params)
+        return f"{self.where} AND candidato IN ({_qmarks(len(candidatos))})", self.params + list(candidatos)
+
+    def vacia(self):
+        row = self.con.execute(f"SELECT EXISTS (SELECT 1 FROM semanal WHERE {self.where})", self.params).fetchone()
+        return not row[0]
+
+    def distintos(self, col, candidatos=None):
+        c = _SQL_COLS[col]
+        where, params = self._filtro(candidatos)
+        return self._q(f"SELECT DISTINCT {c} FROM semanal WHERE {where} AND {c} IS NOT NULL", params)[c].tolist()
+
+    def media(self, keys, col, candidatos=None):
+        ks = [_SQL_COLS[k] for k in keys]
+        where, params = self._filtro(candidatos)
+        c = _SQL_COLS[col]
+        not_null = " AND ".join(f"{k} IS NOT NULL" for k in ks)
+        sql = (f"SELECT {', '.join(ks)}, suma_kahan(fila, {c}) AS s, COUNT({c}) AS n FROM semanal "
+               f"WHERE {where} AND {not_null} GROUP BY {', '.join(ks)} ORDER BY {', '.join(ks)}")
+        g = self._q(sql, params)
+        # La división en float64, como group_mean de pandas (sin valores -> NaN)
+        n = g.pop("n").to_numpy(dtype=float)
+        s = g.pop("s").to_numpy(dtype=float)
+        with np.errstate(invalid="ignore"):
+            g["v"] = np.where(n > 0, s / np.where(n > 0, n, 1), np.nan)
+        return g.set_axis(list(keys) + [col], axis=1)
+
+    def ganadores(self, col):
+        return _ganadores(self.media(["Semana", COL_ESPECTRO, COL_CANDIDATO], col), col)
+
+    def deltas(self, col, weeks):
+        # Una fila por (candidato, espectro) con algún promedio y por semana de 'weeks' (LEFT JOIN:
+        # una semana sin datos queda NULL y corta el Δ, como diff() sobre el pivote); la división
+        # de suma_kahan/COUNT en SQLite es la misma operación IEEE que en numpy
+        c = _SQL_COLS[col]
+        sql = f"""
+            WITH m AS (
+                SELECT candidato, espectro, semana, suma_kahan(fila, {c}) / COUNT({c}) AS v FROM semanal
+                WHERE {self.where} AND candidato IS NOT NULL AND espectro IS NOT NULL AND semana IS NOT NULL
+                GROUP BY candidato, espectro, semana
+            ),
+            grupos AS (SELECT candidato, espectro FROM m GROUP BY candidato, espectro HAVING COUNT(v) > 0),
+            s AS (SELECT CAST(key AS INTEGER) AS orden, value AS semana FROM json_each(?))
+            SELECT grupos.candidato, grupos.espectro,
+                   m.v - LAG(m.v) OVER (PARTITION BY grupos.candidato, grupos.espectro ORDER BY s.orden) AS d
+            FROM grupos CROSS JOIN s
+            LEFT JOIN m ON m.candidato = grupos.candidato AND m.espectro = grupos.espectro AND m.semana = s.semana
+            ORDER BY grupos.candidato, grupos.espectro, s.orden"""
+        g = self._q(sql, self.params + [json.dumps(list(weeks))])
+        index = pd.MultiIndex.from_arrays([g["candidato"].to_numpy()[::len(weeks)], g["espectro"].to_numpy()[::len(weeks)]],
+                                          names=[COL_CANDIDATO, COL_ESPECTRO])
+        d = g["d"].to_numpy(dtype=float).reshape(-1, len(weeks))
+        return pd.DataFrame(d, index=index, columns=pd.Index(weeks, name="Semana"))
+
+QUERY_ENGINES = {"pandas": _ConsultaPandas, "sqlite": _ConsultaSQL}
+
+def _consulta_semanal():
+    return QUERY_ENGINES.get(QUERY_ENGINE, _ConsultaPandas)()
+
+def _semanas_ordenadas(weeks_raw):
+    return [w for w in WEEK_ORDER if w in weeks_raw] + sorted([w for w in weeks_raw if w not in WEEK_ORDER], key=_natural_key)
 
 # === Ganadores / Heatmaps (con hojas semanales) ===
 @app.route("/api/ganador-semanal")
+@cached_response
 def api_ganador_semanal():
     full = load_all()
-    filtered = aplicar_filtros(full)
+    q = _consulta_semanal()
+    vacia = q.vacia()
 
-    if not (request.args.get("semana") or "").strip() and not filtered.empty:
+    if not (request.args.get("semana") or "").strip() and not vacia:
         semanas_presentes = full["Semana"].dropna().unique().tolist()
     else:
-        semanas_presentes = filtered["Semana"].dropna().unique().tolist() if not filtered.empty else []
+        semanas_presentes = q.distintos("Semana") if not vacia else []
     semanas_dom = [w for w in WEEK_ORDER if w in semanas_presentes] or sorted(semanas_presentes, key=_natural_key)
 
     espectros_q  = (request.args.get("espectro") or "").strip()
     espectros_dom = sorted(full[COL_ESPECTRO].dropna().unique().tolist()) if not espectros_q else \
                     sorted(_parse_multi(espectros_q))
 
+    ganadores = q.ganadores("Interacciones") if not vacia else {}
     out = []
     for sem in semanas_dom:
         for esp in espectros_dom:
-            df_se = filtered[(filtered["Semana"] == sem) & (filtered[COL_ESPECTRO] == esp)]
-            if df_se.empty:
+            hit = ganadores.get((sem, esp))
+            if hit is None:
                 out.append({"semana": sem, "espectro": esp, "candidato": None, "interacciones": 0.0, "nd": True})
             else:
-                g = df_se.groupby(COL_CANDIDATO, as_index=False)["Interacciones"].mean()
-                row = g.loc[g["Interacciones"].idxmax()]
                 out.append({
-                    "semana": sem, "espectro": esp, "candidato": row[COL_CANDIDATO],
-                    "interacciones": _r1(row["Interacciones"]), "nd": False
+                    "semana": sem, "espectro": esp, "candidato": hit[0],
+                    "interacciones": _r1(hit[1]), "nd": False
                 })
     return jsonify(out)
 
 @app.route("/api/ganador-semanal-series")
+@cached_response
 def api_ganador_semanal_series():
-    filtered = aplicar_filtros(load_all())
-    if filtered.empty:
+    q = _consulta_semanal()
+    if q.vacia():
         return jsonify({"semanas": [], "espectros": [], "values": []})
 
-    semanas_presentes = filtered["Semana"].dropna().unique().tolist()
+    semanas_presentes = q.distintos("Semana")
     semanas = [w for w in WEEK_ORDER if w in semanas_presentes] or sorted(semanas_presentes, key=_natural_key)
-    espectros = sorted(filtered[COL_ESPECTRO].dropna().unique().tolist())
+    espectros = sorted(q.distintos(COL_ESPECTRO))
 
+    ganadores = q.ganadores("Interacciones")
     values = []
     for sem in semanas:
         for esp in espectros:
-            df_se = filtered[(filtered["Semana"] == sem) & (filtered[COL_ESPECTRO] == esp)]
-            if df_se.empty:
+            hit = ganadores.get((sem, esp))
+            if hit is None:
                 values.append({"semana": sem, "espectro": esp, "interacciones": 0.0, "nd": True})
             else:
-                g = df_se.groupby(COL_CANDIDATO, as_index=False)["Interacciones"].mean()
-                row = g.loc[g["Interacciones"].idxmax()]
-                values.append({"semana": sem, "espectro": esp, "interacciones": _r1(row["Interacciones"]), "nd": False, "candidato": row[COL_CANDIDATO]})
+                values.append({"semana": sem, "espectro": esp, "interacciones": _r1(hit[1]), "nd": False, "candidato": hit[0]})
     return jsonify({"semanas": semanas, "espectros": espectros, "values": values})
 
+def _heatmap_rows(q, col):
+    """
+    Filas del heatmap: candidatos ordenados por su promedio de 'col' (mismo ranking
+    que las barras), recortados si hay top/limit/offset.
+    Devuelve (rows, total, candidatos) donde candidatos restringe las celdas a la página (o None).
+    """
+    paging = _parse_paging()
+    rank = q.media([COL_CANDIDATO], col).set_index(COL_CANDIDATO)[col]
+    rows = rank.index[_rank_page(rank.to_numpy(dtype=float), *(paging or (0, len(rank))))].tolist()
+    return rows, len(rank), (rows if paging is not None else None)
+
+def _heatmap_response(payload, total):
+    if _parse_paging() is not None:
+        payload["total"] = total
+    return _with_total(jsonify(payload), total)
+
+def _celdas(g, k1, k2, col):
+    """{(k1, k2): valor} de un groupby ya agregado."""
+    return dict(zip(zip(g[k1], g[k2]), g[col]))
+
 @app.route("/api/heatmap")
+@cached_response
 def api_heatmap():
-    df = aplicar_filtros(load_all())
-    if df.empty:
+    q = _consulta_semanal()
+    if q.vacia():
         return jsonify({"rows": [], "cols": [], "values": []})
-    rows = sorted(df[COL_CANDIDATO].unique().tolist())
-    cols = sorted(df[COL_RED].unique().tolist())
-    g = df.groupby([COL_CANDIDATO, COL_RED], as_index=False)["Interacciones"].mean()
+    rows, total, cands = _heatmap_rows(q, "Interacciones")
+    cols = sorted(q.distintos(COL_RED))  # columnas del conjunto filtrado completo: iguales en todas las páginas
+    g = _celdas(q.media([COL_CANDIDATO, COL_RED], "Interacciones", cands), COL_CANDIDATO, COL_RED, "Interacciones")
     values = []
     for r in rows:
         for c in cols:
-            sub = g[(g[COL_CANDIDATO]==r) & (g[COL_RED]==c)]
-            if sub.empty or pd.isna(sub["Interacciones"].iloc[0]):
+            v = g.get((r, c))
+            if v is None or pd.isna(v):
                 values.append({"candidato": r, "red": c, "valor": 0, "nd": True})
             else:
-                v = _r1(sub["Interacciones"].iloc[0])
-                values.append({"candidato": r, "red": c, "valor": v, "nd": False})
-    return jsonify({"rows": rows, "cols": cols, "values": values})
+                values.append({"candidato": r, "red": c, "valor": _r1(v), "nd": False})
+    return _heatmap_response({"rows": rows, "cols": cols, "values": values}, total)
 
 @app.route("/api/heatmap-semanal")
+@cached_response
 def api_heatmap_semanal():
     metric = (request.args.get("metric") or "interacciones").lower()
-    df = aplicar_filtros(load_all())
-    if df.empty:
+    q = _consulta_semanal()
+    if q.vacia():
         return jsonify({"rows": [], "cols": [], "values": []})
 
-    if metric == "likes":
-        col = COL_LIKES
-    elif metric == "comentarios":
-        col = COL_COMENT
-    else:
-        col = "Interacciones"
+    col = _metric_column(metric)
 
-    rows = sorted(df[COL_CANDIDATO].unique().tolist())
-    cols_raw = df["Semana"].dropna().unique().tolist()
+    rows, total, cands = _heatmap_rows(q, col)
+    cols_raw = q.distintos("Semana")
     cols = [w for w in WEEK_ORDER if w in cols_raw] or sorted(cols_raw, key=_natural_key)
 
-    g = df.groupby([COL_CANDIDATO, "Semana"], as_index=False)[col].mean()
+    g = _celdas(q.media([COL_CANDIDATO, "Semana"], col, cands), COL_CANDIDATO, "Semana", col)
 
     values = []
     for r in rows:
         for c in cols:
-            sub = g[(g[COL_CANDIDATO]==r) & (g["Semana"]==c)]
-            if sub.empty or pd.isna(sub[col].iloc[0]):
+            v = g.get((r, c))
+            if v is None or pd.isna(v):
                 values.append({"candidato": r, "semana": c, "valor": 0, "nd": True})
             else:
-                values.append({"candidato": r, "semana": c, "valor": _r1(sub[col].iloc[0]), "nd": False})
-    return jsonify({"rows": rows, "cols": cols, "values": values})
+                values.append({"candidato": r, "semana": c, "valor": _r1(v), "nd": False})
+    return _heatmap_response({"rows": rows, "cols": cols, "values": values}, total)
+
+# === Trayectoria: valor, rank en su espectro, media móvil y acumulado por semana ===
+def _r1_list(arr):
+    """Fila numpy -> lista redondeada a 1 decimal, NaN -> None."""
+    return [None if np.isnan(v) else round(float(v), 1) for v in arr]
+
+@app.route("/api/trayectoria")
+@cached_response
+def api_trayectoria():
+    metric = (request.args.get("metric") or "interacciones").lower()
+    if metric not in {"interacciones", "likes", "comentarios"}:
+        return (f"Métrica no soportada: {metric}", 400)
+    df = aplicar_filtros(load_all())
+    if df.empty:
+        return jsonify({"semanas": [], "candidatos": []})
+    col = _metric_column(metric)
+    window = _parse_int_arg("ventana") or 3
+
+    weeks_raw = df["Semana"].dropna().unique().tolist()
+    weeks = [w for w in WEEK_ORDER if w in weeks_raw] + sorted([w for w in weeks_raw if w not in WEEK_ORDER], key=_natural_key)
+
+    # Matriz candidato × semana (mismo groupby que el heatmap semanal)
+    wide = (df.groupby([COL_CANDIDATO, "Semana"], observed=True)[col].mean()
+              .unstack("Semana").reindex(columns=weeks).sort_index())
+    esp = load_candidatos()["espectro"].reindex(wide.index)
+
+    vals = wide.to_numpy(dtype=float)
+    ranks = wide.groupby(esp.fillna("").to_numpy()).rank(ascending=False, method="min").to_numpy(dtype=float)
+    # Media móvil sobre las semanas con dato (ventana en semanas)
+    filled = np.nan_to_num(vals)
+    acumulado = np.cumsum(filled, axis=1)
+    ccount = np.cumsum(~np.isnan(vals), axis=1).astype(float)
+    wsum, wcnt = acumulado.copy(), ccount.copy()
+    if window < vals.shape[1]:
+        wsum[:, window:] -= acumulado[:, :-window]
+        wcnt[:, window:] -= ccount[:, :-window]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rolling = np.where(wcnt > 0, wsum / wcnt, np.nan)
+    acumulado = np.where(ccount > 0, acumulado, np.nan)  # antes del primer dato no hay acumulado
+
+    candidatos = []
+    for i, cand in enumerate(wide.index):
+        candidatos.append({
+            "candidato": cand, "espectro": esp.iat[i],
+            "valores": _r1_list(vals[i]),
+            "rank": [None if np.isnan(r) else int(r) for r in ranks[i]],
+            "media_movil": _r1_list(rolling[i]),
+            "acumulado": _r1_list(acumulado[i]),
+        })
+    return jsonify({"semanas": weeks, "metric": metric, "ventana": window, "candidatos": candidatos})
 
 # >>> NUEVO (DELTA) : API VARIACIÓN HEATMAP
 @app.route("/api/variacion-semanal")
+@cached_response
 def api_variacion_semanal():
     metric = (request.args.get("metric") or "interacciones").lower()
-    df = aplicar_filtros(load_all())
-    if df.empty:
+    q = _consulta_semanal()
+    if q.vacia():
         return jsonify({"rows": [], "cols": [], "values": []})
 
     # Selección de métrica
-    if metric == "likes":
-        col = COL_LIKES
-    elif metric == "comentarios":
-        col = COL_COMENT
-    else:
-        col = "Interacciones"
+    col = _metric_column(metric)
 
     # Semanas presentes ordenadas
-    weeks_raw = df["Semana"].dropna().unique().tolist()
-    weeks = [w for w in WEEK_ORDER if w in weeks_raw] + sorted([w for w in weeks_raw if w not in WEEK_ORDER], key=_natural_key)
+    weeks = _semanas_ordenadas(q.distintos("Semana"))
     if len(weeks) < 2:
         return jsonify({"rows": [], "cols": [], "values": []})
 
-    # Agregación por candidato/espectro/semana
-    g = (df.groupby([COL_CANDIDATO, COL_ESPECTRO, "Semana"], as_index=False)[col].mean())
-
-    # Wide y diff consecutiva
-    wide = g.pivot_table(index=[COL_CANDIDATO, COL_ESPECTRO], columns="Semana", values=col)
-    # asegurar columnas
-    for w in weeks:
-        if w not in wide.columns:
-            wide[w] = pd.NA
-    wide = wide[weeks]
-
-    deltas = wide.diff(axis=1)  # Δ(Sn - S(n-1))
+    # Agregación por candidato/espectro/semana, wide y diff consecutiva
+    deltas = q.deltas(col, weeks)
     cols = weeks[1:]
 
     values = []
@@ -1027,31 +2877,25 @@ def api_variacion_semanal():
 
 # >>> NUEVO (DELTA) : API GANADOR POR VARIACIÓN (lista plana)
 @app.route("/api/ganador-variacion")
+@cached_response
 def api_ganador_variacion():
-    df = aplicar_filtros(load_all())
-    if df.empty:
+    q = _consulta_semanal()
+    if q.vacia():
         return jsonify([])
 
     # Usamos Interacciones para el “ganador por variación” (más estable/representativo).
     col = "Interacciones"
 
-    weeks_raw = df["Semana"].dropna().unique().tolist()
-    weeks = [w for w in WEEK_ORDER if w in weeks_raw] + sorted([w for w in weeks_raw if w not in WEEK_ORDER], key=_natural_key)
+    weeks = _semanas_ordenadas(q.distintos("Semana"))
     if len(weeks) < 2:
         return jsonify([])
 
-    g = (df.groupby([COL_CANDIDATO, COL_ESPECTRO, "Semana"], as_index=False)[col].mean())
-    wide = g.pivot_table(index=[COL_CANDIDATO, COL_ESPECTRO], columns="Semana", values=col)
-    for w in weeks:
-        if w not in wide.columns:
-            wide[w] = pd.NA
-    wide = wide[weeks]
-    deltas = wide.diff(axis=1)
+    deltas = q.deltas(col, weeks)
     cols = weeks[1:]
 
     out = []
     # espectros presentes tras filtros (si no se filtró, usa todos)
-    espectros = sorted(df[COL_ESPECTRO].dropna().unique().tolist())
+    espectros = sorted(q.distintos(COL_ESPECTRO))
     for j, w in enumerate(cols, start=1):
         # índice S# (S2 = Δ vs S1, etc.)
         idx = j + 1
@@ -1074,26 +2918,20 @@ def api_ganador_variacion():
 
 # >>> NUEVO (DELTA) : API GANADOR POR VARIACIÓN (series para gráfico apilado)
 @app.route("/api/ganador-variacion-series")
+@cached_response
 def api_ganador_variacion_series():
-    df = aplicar_filtros(load_all())
-    if df.empty:
+    q = _consulta_semanal()
+    if q.vacia():
         return jsonify({"semanas": [], "espectros": [], "values": []})
 
     col = "Interacciones"
-    weeks_raw = df["Semana"].dropna().unique().tolist()
-    weeks = [w for w in WEEK_ORDER if w in weeks_raw] + sorted([w for w in weeks_raw if w not in WEEK_ORDER], key=_natural_key)
+    weeks = _semanas_ordenadas(q.distintos("Semana"))
     if len(weeks) < 2:
         return jsonify({"semanas": [], "espectros": [], "values": []})
 
-    espectros = sorted(df[COL_ESPECTRO].dropna().unique().tolist())
+    espectros = sorted(q.distintos(COL_ESPECTRO))
 
-    g = (df.groupby([COL_CANDIDATO, COL_ESPECTRO, "Semana"], as_index=False)[col].mean())
-    wide = g.pivot_table(index=[COL_CANDIDATO, COL_ESPECTRO], columns="Semana", values=col)
-    for w in weeks:
-        if w not in wide.columns:
-            wide[w] = pd.NA
-    wide = wide[weeks]
-    deltas = wide.diff(axis=1)
+    deltas = q.deltas(col, weeks)
     cols = weeks[1:]
 
     values = []
@@ -1108,6 +2946,416 @@ def api_ganador_variacion_series():
                 values.append({"semana": w, "espectro": esp, "delta": _r1(best_val), "nd": False})
     return jsonify({"semanas": cols, "espectros": espectros, "values": values})
 
+# === Temas: qué temas mueven la métrica, por espectro y candidato ===
+def _resumen(g):
+    return {"filas": int(g["n"]), "total": _r1(g["total"]), "promedio": _r1(g["promedio"])}
+
+@app.route("/api/temas")
+@cached_response
+def api_temas():
+    metric = (request.args.get("metric") or "interacciones").lower()
+    col = _metric_column(metric)
+    top = min(_parse_int_arg("top") or 5, 50)
+    df = aplicar_filtros(load_all())
+    temas = _indice_temas_cached(_cache_key())[2]
+    esp_dim = load_candidatos()["espectro"]
+    aggs = dict(n=(col, "size"), total=(col, "sum"), promedio=(col, "mean"))
+
+    out = []
+    filas = df.index.to_numpy()
+    for tema, ids in temas.items():
+        sub = df[np.isin(filas, ids)]
+        if sub.empty:
+            continue
+        por_esp = sub.groupby(COL_ESPECTRO, observed=True).agg(**aggs).reset_index()
+        por_cand = (sub.groupby(COL_CANDIDATO, observed=True).agg(**aggs).reset_index()
+                       .sort_values(["total", COL_CANDIDATO], ascending=[False, True]).head(top))
+        out.append(dict(
+            _resumen({"n": len(sub), "total": sub[col].sum(), "promedio": sub[col].mean()}),
+            tema=tema,
+            espectros=[dict(_resumen(r), espectro=r[COL_ESPECTRO])
+                       for _, r in por_esp.sort_values(["total", COL_ESPECTRO], ascending=[False, True]).iterrows()],
+            candidatos=[dict(_resumen(r), candidato=r[COL_CANDIDATO], espectro=esp_dim.get(r[COL_CANDIDATO]))
+                        for _, r in por_cand.iterrows()],
+        ))
+    out.sort(key=lambda t: (-(t["total"] or 0), t["tema"]))
+    return jsonify({"metric": metric, "temas": out})
+
+# === Top de publicaciones por likes (COL_MAXLIKES) ===
+LEADERBOARD_POR = {"semana": "Semana", "espectro": COL_ESPECTRO}
+
+def _top_por_grupo(df):
+    df = df[df[COL_MAXLIKES].notna()] if COL_MAXLIKES in df.columns else df.iloc[0:0]
+    todos_vals, todos_ids = df[COL_MAXLIKES].to_numpy(dtype=float), df.index.to_numpy()
+    listas = {}
+    for (sem, esp), pos in df.groupby(["Semana", COL_ESPECTRO], observed=True, dropna=False).indices.items():
+        vals, ids = todos_vals[pos], todos_ids[pos]
+        top = _top_k(vals, ids, LEADERBOARD_K_MAX)
+        listas[(sem, None if pd.isna(esp) else esp)] = list(zip((-vals[top]).tolist(), ids[top].tolist()))
+    return listas
+
+def _extender_top(prev, nuevas):
+    """Solo los grupos que reciben filas: mezcla de su lista con el top de las nuevas."""
+    listas = dict(prev)
+    for g, top in _top_por_grupo(nuevas).items():
+        listas[g] = list(islice(heapq.merge(listas.get(g, []), top), LEADERBOARD_K_MAX))
+    return listas
+
+@single_flight
+@lru_cache(maxsize=1)
+@incremental(_extender_top)
+def _top_publicaciones_cached(_key):
+    """
+    Por (semana, espectro): los LEADERBOARD_K_MAX mejores como lista ordenada de
+    (-likes, id de fila). Cualquier ventana de semanas/espectros se resuelve
+    mezclando estas listas con un heap, sin tocar el frame.
+    """
+    return _top_por_grupo(load_all())
+
+def _grupos_precalculados(por, k):
+    """Ruta rápida (solo filtros de semana/mes/espectro): heap-merge de las listas precalculadas."""
+    listas = _top_publicaciones_cached(_cache_key())
+    # Mismos dtypes que el frame para que aplicar_filtros compare igual (NaN de category vs None)
+    dtypes = load_all()[["Semana", COL_ESPECTRO]].dtypes.to_dict()
+    claves = pd.DataFrame(list(listas), columns=["Semana", COL_ESPECTRO]).astype(dtypes)
+    claves = aplicar_filtros(claves) if not claves.empty else claves
+    grupos = {}
+    for sem, esp in zip(claves["Semana"], claves[COL_ESPECTRO]):
+        esp = None if pd.isna(esp) else esp
+        g = {"semana": sem, "espectro": esp}.get(por)
+        grupos.setdefault(g, []).append(listas[(sem, esp)])
+    return {g: [i for _, i in islice(heapq.merge(*ls), k)] for g, ls in grupos.items()}
+
+def _grupos_filtrados(por, k):
+    """Ruta general (red/candidato/tema): top-k por partición sobre las filas filtradas."""
+    df = aplicar_filtros(load_all())
+    df = df[df[COL_MAXLIKES].notna()] if COL_MAXLIKES in df.columns else df.iloc[0:0]
+    vals, ids = df[COL_MAXLIKES].to_numpy(dtype=float), df.index.to_numpy()
+    if por is None:
+        pos = {None: np.arange(len(df))}
+    else:
+        # factorize conserva el grupo sin espectro (NaN), como las claves precalculadas
+        codes, uniques = pd.factorize(df[LEADERBOARD_POR[por]].astype(object), use_na_sentinel=False)
+        # Un solo argsort estable: posiciones de cada grupo contiguas y en orden de fila
+        orden = np.argsort(codes, kind="stable")
+        cortes = np.cumsum(np.bincount(codes, minlength=len(uniques)))[:-1]
+        pos = {None if pd.isna(u) else u: p for u, p in zip(uniques, np.split(orden, cortes))}
+    return {g: ids[p][_top_k(vals[p], ids[p], k)].tolist() for g, p in pos.items()}
+
+@app.route("/api/top-publicaciones")
+@cached_response
+def api_top_publicaciones():
+    """?k=10&por=semana|espectro (sin 'por': ranking global) + filtros del dashboard."""
+    k = min(_parse_int_arg("k") or 10, LEADERBOARD_K_MAX)
+    por = (request.args.get("por") or "").strip().lower() or None
+    if por is not None and por not in LEADERBOARD_POR:
+        return (f"'por' no soportado: {por}", 400)
+
+    if any((request.args.get(p) or "").strip() for p in ("red", "candidato", "tema")):
+        grupos = _grupos_filtrados(por, k)
+    else:
+        grupos = _grupos_precalculados(por, k)
+
+    df = load_all()
+    if por == "semana":
+        orden = _semanas_ordenadas([g for g in grupos if g is not None])
+    else:
+        orden = sorted(g for g in grupos if g is not None) + ([None] if None in grupos else [])
+    out = []
+    for g in orden:
+        filas = df.loc[grupos[g]]
+        out.append({"grupo": g, "publicaciones": [
+            {"candidato": c, "espectro": None if pd.isna(e) else e, "red": r, "semana": s,
+             "tema": t if _valid_str(t) else None, "likes": _r1(v)}
+            for c, e, r, s, t, v in zip(filas[COL_CANDIDATO], filas[COL_ESPECTRO], filas[COL_RED], filas["Semana"],
+                                        filas[COL_TEMA] if COL_TEMA in filas.columns else [None] * len(filas),
+                                        filas[COL_MAXLIKES])
+        ]})
+    return jsonify({"k": k, "por": por, "grupos": out})
+
+# === Autocompletado de candidatos ===
+@app.route("/api/candidatos/buscar")
+@cached_response
+def api_candidatos_buscar():
+    q = (request.args.get("q") or "").strip()
+    limit = min(_parse_int_arg("limit") or 10, 50)
+    dim = load_candidatos()
+    return jsonify([
+        {"candidato": n, "espectro": dim.at[n, "espectro"], "redes": list(dim.at[n, "redes"])}
+        for n in buscar_candidatos(q, limit)
+    ])
+
+# === Exportación por streaming (CSV / NDJSON / Parquet) ===
+EXPORT_FORMATS = {
+    "csv":     ("text/csv; charset=utf-8", "csv"),
+    "ndjson":  ("application/x-ndjson; charset=utf-8", "ndjson"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+def _export_frame(fuente):
+    """DataFrame a exportar según ?fuente=, con los mismos filtros que los paneles."""
+    if fuente == "semanal":
+        return aplicar_filtros(load_all())
+    if fuente == "promedios":
+        df = aplicar_filtros_prom(load_promedios())
+        return df[[c for c in df.columns if not str(c).startswith("_")]]
+    df = aplicar_filtros(load_all())
+    if fuente == "heatmap":
+        if df.empty or not {COL_CANDIDATO, COL_RED, "Interacciones"} <= set(df.columns):
+            return pd.DataFrame(columns=[COL_CANDIDATO, COL_RED, "valor"])  # sin datos: solo encabezado
+        return (df.groupby([COL_CANDIDATO, COL_RED], as_index=False, observed=True)["Interacciones"].mean()
+                  .rename(columns={"Interacciones": "valor"}))
+    if fuente == "heatmap-semanal":
+        col = _metric_column((request.args.get("metric") or "interacciones").lower())
+        if df.empty or not {COL_CANDIDATO, "Semana", col} <= set(df.columns):
+            return pd.DataFrame(columns=[COL_CANDIDATO, "Semana", "valor"])
+        g = df.groupby([COL_CANDIDATO, "Semana"], as_index=False, observed=True)[col].mean().rename(columns={col: "valor"})
+        orden = {w: i for i, w in enumerate(WEEK_ORDER)}
+        return g.sort_values([COL_CANDIDATO, "Semana"], key=lambda s: s.astype(object).map(orden).fillna(len(orden)) if s.name == "Semana" else s)
+    return None
+
+def _iter_chunks(df):
+    for start in range(0, len(df), EXPORT_CHUNK_ROWS):
+        yield df.iloc[start:start + EXPORT_CHUNK_ROWS]
+
+def _stream_csv(df):
+    header = True
+    for chunk in _iter_chunks(df):
+        yield chunk.to_csv(index=False, header=header)
+        header = False
+    if header:  # sin filas: solo encabezado
+        yield df.to_csv(index=False)
+
+def _stream_ndjson(df):
+    for chunk in _iter_chunks(df):
+        text = chunk.to_json(orient="records", lines=True, force_ascii=False, date_format="iso")
+        yield text if text.endswith("\n") else text + "\n"
+
+class _DrainSink(io.RawIOBase):
+    """Archivo de solo escritura que entrega y olvida lo escrito (tell() sigue la posición total)."""
+    def __init__(self):
+        super().__init__()
+        self._parts, self._pos = [], 0
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._parts.append(bytes(b))
+        self._pos += len(b)
+        return len(b)
+
+    def tell(self):
+        return self._pos
+
+    def drain(self):
+        out, self._parts = b"".join(self._parts), []
+        return out
+
+def _stream_parquet(df, pa, pq):
+    """Un row group por bloque; cada bloque se entrega en cuanto se escribe."""
+    sink = _DrainSink()
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    writer = pq.ParquetWriter(sink, schema)
+    for chunk in _iter_chunks(df):
+        writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+@app.route("/api/export")
+def api_export():
+    fuente  = (request.args.get("fuente") or "semanal").strip().lower()
+    formato = (request.args.get("formato") or "csv").strip().lower()
+    if formato not in EXPORT_FORMATS:
+        return (f"Formato no soportado: {formato}", 400)
+    df = _export_frame(fuente)
+    if df is None:
+        return (f"Fuente no soportada: {fuente}", 400)
+
+    if formato == "parquet":
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            return ("Parquet requiere pyarrow instalado", 501)
+        body = _stream_parquet(df, pa, pq)
+    elif formato == "ndjson":
+        body = _stream_ndjson(df)
+    else:
+        body = _stream_csv(df)
+
+    mimetype, ext = EXPORT_FORMATS[formato]
+    headers = {"Content-Disposition": f'attachment; filename="export_{fuente}.{ext}"'}
+    return Response(body, content_type=mimetype, headers=headers)
+
+# === Ingesta de semanas (POST autenticado) ===
+INGEST_COLS = [COL_ESPECTRO, COL_CANDIDATO, COL_RED, COL_LIKES, COL_MAXLIKES, COL_TEMA, COL_COMENT, "Semana"]
+
+@app.before_request
+def _sync_ingesta():
+    # Un os.stat por request: aplica lotes escritos por otros workers
+    _INGESTA.sync()
+
+def _ingest_error(msg, status=400):
+    return jsonify({"error": msg}), status
+
+def _bearer_ok(token):
+    """Authorization: Bearer <token>, comparado en tiempo constante."""
+    auth = request.headers.get("Authorization") or ""
+    # En bytes: compare_digest con str rechaza (TypeError) todo lo que no sea ASCII
+    return hmac.compare_digest((auth[7:] if auth.startswith("Bearer ") else "").encode("utf-8"),
+                               token.encode("utf-8"))
+
+@app.route("/api/ingesta", methods=["POST"])
+def api_ingesta():
+    if not INGEST_TOKEN:
+        return ("Not found", 404)
+    if not _bearer_ok(INGEST_TOKEN):
+        return _ingest_error("No autorizado", 401)
+
+    semana = (request.args.get("semana") or "").strip() or None
+    try:
+        if request.mimetype == "text/csv" or request.args.get("formato") == "csv":
+            filas = pd.read_csv(io.StringIO(request.get_data(as_text=True)), float_precision="round_trip")
+        else:
+            body = request.get_json(force=True, silent=True)
+            if isinstance(body, dict):
+                semana = semana or (str(body.get("semana") or "").strip() or None)
+                body = body.get("filas")
+            if not isinstance(body, list) or not all(isinstance(r, dict) for r in body):
+                return _ingest_error("Se espera una lista de filas (o {'semana':..., 'filas': [...]})")
+            filas = pd.DataFrame(body)
+    except Exception as e:
+        return _ingest_error(f"No se pudo leer el cuerpo: {e}")
+
+    if filas.empty:
+        return _ingest_error("Sin filas")
+    if len(filas) > INGEST_MAX_ROWS:
+        return _ingest_error(f"Máximo {INGEST_MAX_ROWS} filas por lote", 413)
+    faltan = [c for c in (COL_CANDIDATO, COL_RED) if c not in filas.columns]
+    if COL_LIKES not in filas.columns and COL_COMENT not in filas.columns:
+        faltan.append(f"{COL_LIKES} o {COL_COMENT}")
+    if not semana and "Semana" not in filas.columns:
+        faltan.append("Semana (columna o ?semana=)")
+    if faltan:
+        return _ingest_error("Faltan columnas: " + ", ".join(faltan))
+
+    ignoradas = [c for c in filas.columns if c not in INGEST_COLS]
+    filas = filas[[c for c in INGEST_COLS if c in filas.columns]]
+    prueba = filas.copy()
+    if semana:
+        prueba["Semana"] = semana
+    validas = len(_limpiar_semanal(prueba))
+    if not validas:
+        return _ingest_error("Ninguna fila válida (Candidato / Red Social / Semana vacíos)")
+
+    registro = {"ts": time.time(), "semana": semana,
+                "filas": filas.astype(object).where(filas.notna(), None).to_dict("records")}
+    # Antes de persistir: el store es append-only y cada arranque lo reproduce entero
+    try:
+        _INGESTA.validar(registro)
+    except Exception as e:
+        return _ingest_error(f"Lote no aplicable: {e}")
+    antes = len(load_all())
+    try:
+        _INGESTA.append(registro)
+    except OSError as e:
+        return _ingest_error(f"No se pudo persistir el lote: {e}", 500)
+    return jsonify({
+        "recibidas": len(filas), "validas": validas, "agregadas": len(load_all()) - antes,
+        "ignoradas": ignoradas, "version": _INGESTA.version,
+    })
+
+# === Actualización en vivo: versión del snapshot por long-poll ===
+_LIVE_WAITERS = threading.BoundedSemaphore(LIVE_MAX_WAITERS) if LIVE_MAX_WAITERS > 0 else None
+
+def _suma_filas(df):
+    """
+    Suma (mod 2**64) del hash de cada fila: aditiva, así que la de base + lote es la de
+    base más la del lote. Valores normalizados (category -> object, float -> float64)
+    para que no dependa de los dtypes compactos que toque cada concat.
+    """
+    norm = pd.DataFrame({c: (df[c].astype(object) if isinstance(df[c].dtype, pd.CategoricalDtype) else
+                             df[c].astype(np.float64) if df[c].dtype.kind == "f" else df[c]) for c in df.columns})
+    return int(pd.util.hash_pandas_object(norm, index=False).to_numpy().sum(dtype=np.uint64))
+
+def _huella(suma, columnas):
+    return hashlib.sha1(f"{suma}|{'|'.join(map(str, columnas))}".encode("utf-8")).hexdigest()[:16]
+
+def _estado_huellas(semanal, columnas, promedios):
+    fuentes = {"semanal": _huella(semanal, columnas), "promedios": promedios}
+    version = hashlib.sha1(json.dumps(fuentes, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+    return {"version": version, "fuentes": fuentes}, semanal
+
+def _extender_huellas(prev, nuevas):
+    estado, suma = prev
+    return _estado_huellas((suma + _suma_filas(nuevas)) % 2**64, load_all().columns, estado["fuentes"]["promedios"])
+
+@single_flight
+@lru_cache(maxsize=4)
+@incremental(_extender_huellas)
+def _huellas_cached(_key):
+    """Huella de contenido por fuente: un lote que solo trae duplicados no cambia nada."""
+    prom = load_promedios()
+    return _estado_huellas(_suma_filas(load_all()), load_all().columns, _huella(_suma_filas(prom), prom.columns))
+
+def _huellas():
+    return _huellas_cached(_cache_key())[0]
+
+@app.route("/api/version")
+def api_version():
+    """
+    ?v=<versión conocida>&espera=1 -> responde al cambiar el snapshot o tras LIVE_WAIT_S.
+    Sin hilos libres para esperar, responde ya con 'reintentar' (segundos).
+    """
+    estado = _huellas()
+    headers = {"Cache-Control": "no-store"}
+    if request.args.get("v") != estado["version"] or request.args.get("espera") != "1":
+        return jsonify(estado), 200, headers
+    if _LIVE_WAITERS is None or not _LIVE_WAITERS.acquire(blocking=False):
+        return jsonify(dict(estado, reintentar=LIVE_RETRY_S)), 200, headers
+    if ADMISSION_ENABLED and not _CARRIL_GENERAL.acquire(blocking=False):
+        _LIVE_WAITERS.release()
+        return jsonify(dict(estado, reintentar=LIVE_RETRY_S)), 200, headers
+    try:
+        key = _cache_key()
+        limite = time.monotonic() + LIVE_WAIT_S
+        while _cache_key() == key:
+            resta = limite - time.monotonic()
+            if resta <= 0:
+                break
+            with _INGESTA.cambio:
+                _INGESTA.cambio.wait(min(1.0, resta))
+            _INGESTA.sync()  # lotes escritos por otros workers (un os.stat por segundo)
+    finally:
+        _LIVE_WAITERS.release()
+        if ADMISSION_ENABLED:
+            _CARRIL_GENERAL.release()
+    return jsonify(_huellas()), 200, headers
+
+# === Admin: memoria de los frames del snapshot ===
+@app.route("/api/admin/memoria")
+def api_admin_memoria():
+    if not ADMIN_TOKEN:
+        return ("Not found", 404)
+    if not _bearer_ok(ADMIN_TOKEN):
+        return _ingest_error("No autorizado", 401)
+    base = _load_all_cached(_source_key())
+    vivo = load_all()
+    frames = {
+        "semanal": _memoria_frame(base),
+        "semanal_ingesta": _memoria_frame(vivo) if vivo is not base else None,
+        "promedios": _memoria_frame(load_promedios()),
+        "candidatos": _memoria_frame(load_candidatos()),
+    }
+    return jsonify({
+        "pid": os.getpid(),
+        "version": _INGESTA.version,
+        "total_bytes": sum(f["bytes"] for f in frames.values() if f),
+        "frames": frames,
+    })
+
 # === Health checks para Render ===
 @app.route("/health", methods=["GET", "HEAD"])
 @app.route("/healthz", methods=["GET", "HEAD"])
@@ -1115,6 +3363,56 @@ def api_ganador_variacion_series():
 def health():
     return ("ok", 200, {"Content-Type": "text/plain; charset=utf-8"})
 
+# === Readiness: 503 hasta que termine el warm-up ===
+_READY = threading.Event()
+
+@app.route("/ready", methods=["GET", "HEAD"])
+def ready():
+    if _READY.is_set():
+        return ("ready", 200, {"Content-Type": "text/plain; charset=utf-8"})
+    return ("warming up", 503, {"Content-Type": "text/plain; charset=utf-8", "Retry-After": "5"})
+
+# Paneles que el dashboard pide al cargar (sin filtros)
+WARMUP_PATHS = [
+    "/api/bootstrap", "/api/likes-por-candidato", "/api/comentarios-por-candidato",
+    "/api/candidatos-todos", "/api/ganador-semanal", "/api/ganador-semanal-series",
+    "/api/heatmap", "/api/temas", "/api/top-publicaciones", "/api/heatmap-semanal", "/api/variacion-semanal",
+    "/api/ganador-variacion", "/api/ganador-variacion-series",
+]
+
+def warmup():
+    """Construye el snapshot y, si WARMUP_RESPONSES, precalienta las respuestas frecuentes."""
+    t0 = time.perf_counter()
+    try:
+        build_snapshot()
+        if QUERY_ENGINE == "sqlite":
+            _sql_db_cached(_cache_key())
+        # Arranque en caliente: si el disco ya tiene respuestas de este contenido no se recalculan;
+        # /ready no responde 200 hasta terminar, para no recibir tráfico a medio precalentar
+        if WARMUP_RESPONSES and not (_DISCO is not None and _DISCO.tiene_version(_huella_contenido())):
+            client = app.test_client()
+            for q in [""] + WARMUP_QUERIES:
+                for path in WARMUP_PATHS:
+                    client.get(path + ("?" + q if q else ""))
+        app.logger.info("Warm-up listo en %.1fs", time.perf_counter() - t0)
+    except Exception:
+        # Si falla, las rutas siguen cargando de forma perezosa como antes
+        app.logger.exception("Falló el warm-up")
+    finally:
+        _READY.set()
+
+if PRELOAD_SNAPSHOT:
+    # El master construye el snapshot una sola vez; los workers lo heredan por fork
+    # (copy-on-write). gc.freeze() saca esos objetos de las generaciones del GC
+    # para que las pasadas de recolección en cada worker no escriban sus páginas.
+    warmup()
+    gc.collect()
+    gc.freeze()
+elif WARMUP:
+    threading.Thread(target=warmup, name="warmup", daemon=True).start()
+else:
+    _READY.set()
+
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 5000))
     app.run(host="0.0.0.0", port=port)
@@ -0,0 +1,210 @@
+"""
+Prueba de carga del dashboard, 100% offline.
+
+Genera un Excel sintético con el mismo esquema que el real, levanta la app con
+gunicorn (workers/threads configurables) y reproduce el patrón de requests del
+dashboard: '/', '/api/bootstrap' y los paneles con filtros aleatorios.
+Reporta throughput, p50/p99 y errores por ruta.
+
+Ejemplos:
+    python loadtest.py --workers 2 --threads 2 --concurrency 8 --sessions 200
+    python loadtest.py --url http://127.0.0.1:5000 --concurrency 4
+"""
+import argparse
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+os.environ.setdefault("WARMUP", "0")  # solo importamos constantes; no cargar el Excel aquí
+import app as dashboard
+
+# Paneles que drawAll() pide tras /api/bootstrap
+PANELES = [
+    "/api/likes-por-candidato", "/api/comentarios-por-candidato", "/api/candidatos-todos",
+    "/api/ganador-semanal", "/api/ganador-semanal-series", "/api/heatmap", "/api/temas", "/api/top-publicaciones",
+    "/api/heatmap-semanal", "/api/variacion-semanal",
+    "/api/ganador-variacion", "/api/ganador-variacion-series",
+]
+CON_METRICA = {"/api/heatmap-semanal", "/api/variacion-semanal"}
+REDES = ["Instagram", "Tiktok", "X"]
+ESPECTROS = ["Centro", "Derecha", "Izquierda"]
+MESES = ["Septiembre", "Octubre"]
+METRICAS = ["interacciones", "likes", "comentarios"]
+
+
+# ---------- Excel sintético ----------
+def generar_excel(path, n_candidatos, n_semanas, seed):
+    rng = random.Random(seed)
+    candidatos = [(f"Candidato {i + 1}", ESPECTROS[i % len(ESPECTROS)]) for i in range(n_candidatos)]
+    semanas = [f"Semana {k}" for k in range(1, n_semanas + 1)]
+    prom_rows = []
+    with pd.ExcelWriter(path, engine="openpyxl") as xw:
+        for sh in semanas:
+            rows = []
+            for cand, esp in candidatos:
+                for red in REDES:
+                    likes = round(rng.lognormvariate(7, 1.2), 1)
+                    coment = round(rng.lognormvariate(4, 1.0), 1)
+                    rows.append({
+                        dashboard.COL_ESPECTRO: esp, dashboard.COL_CANDIDATO: cand, dashboard.COL_RED: red,
+                        dashboard.COL_LIKES: likes, dashboard.COL_MAXLIKES: round(likes * rng.uniform(1, 8)),
+                        dashboard.COL_TEMA: f"Tema {rng.randint(1, 20)}", dashboard.COL_COMENT: coment,
+                    })
+                    prom_rows.append({
+                        dashboard.PROM_COL_SEMANA: dashboard.WEEK_MAP.get(sh, sh), dashboard.PROM_COL_ESPECTRO: esp,
+                        dashboard.PROM_COL_CANDIDATO: cand, dashboard.PROM_COL_RED: red,
+                        dashboard.PROM_COL_INTERSEM: likes + coment, dashboard.PROM_COL_LIKES: likes,
+                        dashboard.PROM_COL_COMENT: coment,
+                    })
+            pd.DataFrame(rows).to_excel(xw, sheet_name=sh, index=False)
+        pd.DataFrame(prom_rows).to_excel(xw, sheet_name=dashboard.PROM_SHEET, index=False)
+    return semanas
+
+
+# ---------- Servidor local ----------
+def _puerto_libre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def levantar_app(excel_path, workers, threads, preload):
+    port = _puerto_libre()
+    env = dict(os.environ, EXCEL_PATH=excel_path, WARMUP="1", PRELOAD_SNAPSHOT="1" if preload else "")
+    cmd = [sys.executable, "-m", "gunicorn", "app:app", "--workers", str(workers), "--threads", str(threads),
+           "--timeout", "120", "--bind", f"127.0.0.1:{port}", "--log-level", "warning"]
+    if preload:
+        cmd.append("--preload")
+    proc = subprocess.Popen(cmd, cwd=os.path.dirname(os.path.abspath(dashboard.__file__)), env=env)
+    base = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 180
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError("gunicorn terminó antes de estar listo")
+        try:
+            with urllib.request.urlopen(base + "/ready", timeout=2) as r:
+                if r.status == 200:
+                    return proc, base
+        except (urllib.error.URLError, OSError):
+            pass
+        time.sleep(0.25)
+    proc.terminate()
+    raise RuntimeError("la app no quedó lista a tiempo")
+
+
+# ---------- Tráfico ----------
+def _filtros_aleatorios(rng, semanas):
+    params = {}
+    if rng.random() < 0.4:
+        params["red"] = ",".join(rng.sample(REDES, rng.randint(1, 2)))
+    if rng.random() < 0.4:
+        params["espectro"] = ",".join(rng.sample(ESPECTROS, rng.randint(1, 2)))
+    if rng.random() < 0.3:
+        params["semana"] = ",".join(rng.sample(semanas, min(len(semanas), rng.randint(1, 4))))
+    elif rng.random() < 0.2:
+        params["mes"] = rng.choice(MESES)
+    return params
+
+def sesion(base, rng, semanas, registro):
+    """Una visita al dashboard: página, bootstrap y los paneles con los mismos filtros."""
+    filtros = _filtros_aleatorios(rng, semanas)
+    metrica = rng.choice(METRICAS)
+    urls = [("/", {}), ("/api/bootstrap", {})]
+    for ruta in PANELES:
+        params = dict(filtros)
+        if ruta in CON_METRICA:
+            params["metric"] = metrica
+        urls.append((ruta, params))
+    for ruta, params in urls:
+        url = base + ruta + ("?" + urllib.parse.urlencode(params) if params else "")
+        t0 = time.perf_counter()
+        ok = True
+        try:
+            with urllib.request.urlopen(url, timeout=120) as r:
+                r.read()
+                ok = r.status == 200
+        except (urllib.error.URLError, OSError):
+            ok = False
+        registro(ruta, (time.perf_counter() - t0) * 1000.0, ok)
+
+def _percentil(valores, p):
+    if not valores:
+        return 0.0
+    v = sorted(valores)
+    return v[min(len(v) - 1, int(round(p / 100.0 * (len(v) - 1))))]
+
+def correr(base, semanas, sesiones, concurrencia, seed):
+    lat = defaultdict(list)
+    errores = defaultdict(int)
+    lock = threading.Lock()
+
+    def registro(ruta, ms, ok):
+        with lock:
+            lat[ruta].append(ms)
+            if not ok:
+                errores[ruta] += 1
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrencia) as pool:
+        futs = [pool.submit(sesion, base, random.Random(seed + i), semanas, registro) for i in range(sesiones)]
+        for f in futs:
+            f.result()
+    duracion = time.perf_counter() - t0
+
+    total = sum(len(v) for v in lat.values())
+    total_err = sum(errores.values())
+    print(f"\n{total} requests en {duracion:.1f}s -> {total / duracion:.1f} req/s "
+          f"({sesiones / duracion:.2f} sesiones/s), errores {total_err} ({100.0 * total_err / max(total, 1):.2f}%)\n")
+    print(f"{'ruta':38} {'n':>6} {'p50 ms':>9} {'p99 ms':>9} {'media ms':>9} {'err %':>7}")
+    for ruta in ["/", "/api/bootstrap"] + PANELES:
+        v = lat.get(ruta, [])
+        print(f"{ruta:38} {len(v):6d} {_percentil(v, 50):9.1f} {_percentil(v, 99):9.1f} "
+              f"{(sum(v) / len(v) if v else 0):9.1f} {100.0 * errores[ruta] / max(len(v), 1):7.2f}")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Prueba de carga offline del dashboard")
+    ap.add_argument("--url", help="usar un servidor ya levantado en vez de arrancar gunicorn")
+    ap.add_argument("--excel", help="usar este Excel en vez de uno sintético")
+    ap.add_argument("--workers", type=int, default=1)
+    ap.add_argument("--threads", type=int, default=2)
+    ap.add_argument("--preload", action="store_true", help="gunicorn --preload con PRELOAD_SNAPSHOT=1")
+    ap.add_argument("--concurrency", type=int, default=4, help="sesiones simultáneas")
+    ap.add_argument("--sessions", type=int, default=50, help="visitas al dashboard a reproducir")
+    ap.add_argument("--candidatos", type=int, default=40)
+    ap.add_argument("--semanas", type=int, default=12)
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args(argv)
+
+    semanas = [f"Semana {k}" for k in range(1, args.semanas + 1)]
+    if args.url:
+        correr(args.url.rstrip("/"), semanas, args.sessions, args.concurrency, args.seed)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        excel = args.excel
+        if not excel:
+            excel = os.path.join(tmp, "sintetico.xlsx")
+            generar_excel(excel, args.candidatos, args.semanas, args.seed)
+        proc, base = levantar_app(os.path.abspath(excel), args.workers, args.threads, args.preload)
+        try:
+            print(f"gunicorn workers={args.workers} threads={args.threads} preload={args.preload} en {base}")
+            correr(base, semanas, args.sessions, args.concurrency, args.seed)
+        finally:
+            proc.terminate()
+            proc.wait(timeout=30)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,13 @@
+"""
+Punto de entrada de las tareas del pool de parseo de hojas (ver app._parseo_paralelo_cached).
+
+No importa app: con gunicorn --preload el pool corre mientras app todavía se está
+importando, y un hijo que necesitara importarlo para deserializar la tarea se quedaría
+esperando para siempre el lock de ese import. app registra sus funciones en TAREAS antes
+de crear el pool y los hijos (fork) las heredan ya resueltas.
+"""
+TAREAS = {}
+
+
+def ejecutar(nombre, *args):
+    return TAREAS[nombre](*args)
@@ -0,0 +1,25 @@
+import os
+import sys
+
+# Sin warm-up en segundo plano: cada test carga el snapshot de forma perezosa
+os.environ.setdefault("WARMUP", "0")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+import app as dashboard
+
+
+@pytest.fixture
+def client():
+    return dashboard.app.test_client()
+
+
+@pytest.fixture(autouse=True)
+def _cache_limpia():
+    """Cada test parte sin respuestas cacheadas (varios cambian la configuración del módulo)."""
+    with dashboard._RESPONSE_CACHE_LOCK:
+        dashboard._RESPONSE_CACHE.clear()
+    yield
+    with dashboard._RESPONSE_CACHE_LOCK:
+        dashboard._RESPONSE_CACHE.clear()
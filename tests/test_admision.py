@@ -0,0 +1,85 @@
+import threading
+
+import pytest
+
+import app as dashboard
+
+
+@pytest.fixture
+def admision(monkeypatch):
+    monkeypatch.setattr(dashboard, "ADMISSION_ENABLED", True)
+    monkeypatch.setattr(dashboard, "ADMISSION_MAX_WAIT_MS", 50)
+    monkeypatch.setattr(dashboard, "_ADMISSION_RUTAS", {})
+    monkeypatch.setattr(dashboard, "_ADMISSION_GLOBAL", threading.BoundedSemaphore(2))
+    monkeypatch.setattr(dashboard, "_CARRIL_GENERAL", threading.BoundedSemaphore(4))
+    return dashboard
+
+
+def _ocupar(sem):
+    n = 0
+    while sem.acquire(blocking=False):
+        n += 1
+    return n
+
+
+def test_sin_slot_de_ruta_responde_503(client, admision):
+    ruta = admision._semaforo_ruta("/api/heatmap")
+    n = _ocupar(ruta)
+    r = client.get("/api/heatmap")
+    assert r.status_code == 503 and r.headers["Retry-After"] == str(admision.ADMISSION_RETRY_S)
+    assert r.headers["Cache-Control"] == "no-store"
+    for _ in range(n):
+        ruta.release()
+    assert client.get("/api/heatmap").status_code == 200
+    assert _ocupar(admision._CARRIL_GENERAL) == 4
+
+
+def test_cola_llena_responde_503_sin_esperar(client, admision, monkeypatch):
+    monkeypatch.setattr(dashboard, "ADMISSION_QUEUE", 0)
+    monkeypatch.setattr(dashboard, "ADMISSION_MAX_WAIT_MS", 60_000)
+    _ocupar(admision._ADMISSION_GLOBAL)
+    assert client.get("/api/heatmap").status_code == 503
+
+
+def test_seguidor_de_un_vuelo_en_curso_pasa_por_la_admision(client, admision):
+    with dashboard.app.test_request_context("/api/heatmap"):
+        key = (dashboard._cache_key(),) + dashboard._query_key()
+    with dashboard._VUELOS_LOCK:
+        dashboard._VUELOS[key] = dashboard._Vuelo()
+    try:
+        _ocupar(admision._semaforo_ruta("/api/heatmap"))
+        assert client.get("/api/heatmap").status_code == 503
+    finally:
+        with dashboard._VUELOS_LOCK:
+            dashboard._VUELOS.pop(key, None)
+
+
+def test_carril_lleno_deja_libre_health_y_cache(client, admision):
+    assert client.get("/api/heatmap").status_code == 200  # queda en cache
+    _ocupar(admision._CARRIL_GENERAL)
+    assert client.get("/api/heatmap-semanal").status_code == 503
+    assert client.get("/api/heatmap").status_code == 200
+    assert client.get("/health").status_code == 200
+
+
+def test_long_poll_sin_carril_pide_reintentar(client, admision, monkeypatch):
+    monkeypatch.setattr(dashboard, "_LIVE_WAITERS", threading.BoundedSemaphore(1))
+    version = client.get("/api/version").get_json()["version"]
+    _ocupar(admision._CARRIL_GENERAL)
+    r = client.get(f"/api/version?v={version}&espera=1")
+    assert r.get_json()["reintentar"] == dashboard.LIVE_RETRY_S
+    assert dashboard._LIVE_WAITERS.acquire(blocking=False)  # el hueco de espera se devolvió
+
+
+def test_export_retiene_el_slot_hasta_cerrar(client, admision):
+    ruta = admision._semaforo_ruta("/api/export")
+    r = client.get("/api/export?formato=csv", buffered=False)
+    assert r.status_code == 200
+    primero = next(r.response)
+    assert primero
+    libres = _ocupar(ruta)
+    assert libres == dashboard.ADMISSION_SLOTS - 1  # el export sigue ocupando el suyo
+    for _ in range(libres):
+        ruta.release()
+    r.close()
+    assert _ocupar(ruta) == dashboard.ADMISSION_SLOTS
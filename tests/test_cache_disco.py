@@ -0,0 +1,115 @@
+import sqlite3
+from contextlib import closing
+
+import pytest
+
+import app as dashboard
+
+
+@pytest.fixture
+def disco(tmp_path, monkeypatch):
+    cache = dashboard._CacheDisco(str(tmp_path / "respuestas.sqlite"), 1000)
+    monkeypatch.setattr(dashboard, "_DISCO", cache)
+    return cache
+
+
+def _totales(cache):
+    with closing(sqlite3.connect(cache.path)) as con:
+        suma = con.execute("SELECT COALESCE(SUM(bytes), 0) FROM respuestas").fetchone()[0]
+        return con.execute("SELECT bytes FROM uso").fetchone()[0], suma
+
+
+def test_total_corrido_sigue_a_la_tabla(disco):
+    disco.put("a", "v1", b"x" * 100, "application/json", [])
+    disco.put("b", "v1", b"x" * 200, "application/json", [])
+    disco.put("a", "v1", b"x" * 50, "application/json", [])  # reemplazo
+    assert _totales(disco) == (250, 250)
+    for i in range(10):
+        disco.put(f"c{i}", "v1", b"x" * 150, "application/json", [])
+    usado, suma = _totales(disco)
+    assert usado == suma <= disco.max_bytes
+    assert disco.contiene("c9") and not disco.contiene("b")  # se expulsa lo de acceso más antiguo
+
+
+def test_archivo_previo_sin_contador(tmp_path):
+    path = str(tmp_path / "viejo.sqlite")
+    with closing(sqlite3.connect(path)) as con:
+        con.execute("CREATE TABLE respuestas (clave TEXT PRIMARY KEY, version TEXT NOT NULL, cuerpo BLOB NOT NULL, "
+                    "mimetype TEXT, headers TEXT, bytes INTEGER NOT NULL, acceso REAL NOT NULL)")
+        con.execute("INSERT INTO respuestas VALUES ('a', 'v', x'00', NULL, '[]', 300, 0)")
+        con.commit()
+    cache = dashboard._CacheDisco(path, 1000)
+    cache.put("b", "v", b"x" * 10, "application/json", [])
+    assert _totales(cache) == (310, 310)
+
+
+def test_respuesta_servida_desde_disco(client, disco):
+    disco.max_bytes = 10 * 1024 * 1024
+    r = client.get("/api/heatmap")
+    with dashboard.app.test_request_context("/api/heatmap"):
+        clave = dashboard._clave_disco()[1]
+    assert disco.contiene(clave)
+    with dashboard._RESPONSE_CACHE_LOCK:
+        dashboard._RESPONSE_CACHE.clear()
+    assert client.get("/api/heatmap").get_data() == r.get_data()
+
+
+def test_huella_memoizada_por_snapshot(monkeypatch):
+    llamadas = []
+    original = dashboard._temas_dict
+    monkeypatch.setattr(dashboard, "_temas_dict", lambda: llamadas.append(1) or original())
+    monkeypatch.setattr(dashboard, "LEADERBOARD_K_MAX", dashboard.LEADERBOARD_K_MAX + 1)  # clave nueva
+    primera = dashboard._huella_contenido()
+    for _ in range(5):
+        assert dashboard._huella_contenido() == primera
+    assert len(llamadas) == 1
+
+
+def test_huella_incluye_la_configuracion_de_salida(monkeypatch):
+    base = dashboard._huella_contenido()
+    monkeypatch.setattr(dashboard, "LEADERBOARD_K_MAX", dashboard.LEADERBOARD_K_MAX + 10)
+    assert dashboard._huella_contenido() != base
+    monkeypatch.undo()
+    assert dashboard._huella_contenido() == base
+    monkeypatch.setattr(dashboard, "QUERY_ENGINE", "sqlite" if dashboard.QUERY_ENGINE != "sqlite" else "pandas")
+    assert dashboard._huella_contenido() != base
+
+
+def test_ready_solo_con_el_snapshot_armado(disco, monkeypatch):
+    disco.put("x", dashboard._huella_contenido(), b"{}", "application/json", [])
+    vistos = []
+    monkeypatch.setattr(dashboard, "build_snapshot", lambda: vistos.append(dashboard._READY.is_set()))
+    dashboard._READY.clear()
+    try:
+        dashboard.warmup()
+        assert vistos == [False] and dashboard._READY.is_set()
+    finally:
+        dashboard._READY.set()
+
+
+class _ClienteEspia:
+    def __init__(self, vistos):
+        self.vistos = vistos
+
+    def get(self, path):
+        self.vistos.append((path, dashboard._READY.is_set()))
+
+
+def test_ready_despues_del_precalentado(disco, monkeypatch):
+    vistos = []
+    monkeypatch.setattr(dashboard, "build_snapshot", lambda: None)
+    monkeypatch.setattr(dashboard, "WARMUP_RESPONSES", True)
+    monkeypatch.setattr(dashboard, "WARMUP_QUERIES", [])
+    monkeypatch.setattr(dashboard.app, "test_client", lambda: _ClienteEspia(vistos))
+    dashboard._READY.clear()
+    try:
+        dashboard.warmup()
+        assert vistos == [(p, False) for p in dashboard.WARMUP_PATHS] and dashboard._READY.is_set()
+
+        # Con la versión ya en disco no se precalienta
+        vistos.clear()
+        disco.put("x", dashboard._huella_contenido(), b"{}", "application/json", [])
+        dashboard.warmup()
+        assert vistos == []
+    finally:
+        dashboard._READY.set()
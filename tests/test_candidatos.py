@@ -0,0 +1,34 @@
+import pytest
+
+import app as dashboard
+
+
+def _fuerza_bruta(q):
+    pref = dashboard._sin_acentos(q)
+    hits = {}
+    for nombre in dashboard.load_candidatos().index:
+        palabras = dashboard._sin_acentos(nombre).split(" ")
+        pos = [i for i in range(len(palabras)) if " ".join(palabras[i:]).startswith(pref)]
+        if pos:
+            hits[nombre] = min(pos)
+    return sorted(hits, key=lambda n: (hits[n], dashboard._sin_acentos(n)))
+
+
+@pytest.mark.parametrize("q", ["a", "ju", "JUAN D", "uribe", "lopez", "López", "cárd", "zz"])
+def test_indice_de_prefijos_igual_a_fuerza_bruta(q):
+    assert dashboard.buscar_candidatos(q, limit=1000) == _fuerza_bruta(q)
+
+
+def test_buscar_endpoint(client):
+    r = client.get("/api/candidatos/buscar?q=uribe").get_json()
+    assert [c["candidato"] for c in r] == ["Miguel Uribe Londoño"]
+    assert r[0]["espectro"] == dashboard.load_candidatos().at["Miguel Uribe Londoño", "espectro"]
+    assert len(client.get("/api/candidatos/buscar?q=juan&limit=2").get_json()) == 2
+    assert client.get("/api/candidatos/buscar?q=").get_json() == []
+
+
+def test_filtro_de_candidato_sin_tildes(client):
+    exacto = client.get("/api/heatmap", query_string={"candidato": "Claudia López"}).get_json()
+    assert client.get("/api/heatmap", query_string={"candidato": "claudia lopez"}).get_json() == exacto
+    assert client.get("/api/heatmap", query_string={"candidato": "nadie"}).get_json() != exacto
+
@@ -0,0 +1,87 @@
+import threading
+import time
+
+import app as dashboard
+
+
+class _LockContado:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.usos = 0
+
+    def __enter__(self):
+        self.usos += 1
+        return self._lock.__enter__()
+
+    def __exit__(self, *exc):
+        return self._lock.__exit__(*exc)
+
+
+def _en_paralelo(n, fn):
+    resultados, errores = [None] * n, [None] * n
+
+    def correr(i):
+        try:
+            resultados[i] = fn()
+        except Exception as e:
+            errores[i] = e
+
+    hilos = [threading.Thread(target=correr, args=(i,)) for i in range(n)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    return resultados, errores
+
+
+def test_misses_concurrentes_calculan_una_vez():
+    llamadas = []
+    listo = threading.Event()
+
+    def lento():
+        llamadas.append(1)
+        listo.wait(1)
+        return object()
+
+    threading.Timer(0.2, listo.set).start()
+    resultados, errores = _en_paralelo(6, lambda: dashboard.coalesce(("test", "lento"), lento))
+    assert errores == [None] * 6
+    assert len(llamadas) == 1
+    assert all(r is resultados[0] for r in resultados)
+
+
+def test_seguidores_reciben_copia_de_la_excepcion():
+    def falla():
+        time.sleep(0.2)
+        raise ValueError("sin datos")
+
+    _, errores = _en_paralelo(4, lambda: dashboard.coalesce(("test", "falla"), falla))
+    assert all(isinstance(e, ValueError) and str(e) == "sin datos" for e in errores)
+    assert len({id(e) for e in errores}) == 4
+    lideres = [e for e in errores if e.__cause__ is None]
+    assert len(lideres) == 1
+    assert all(e.__cause__ is lideres[0] for e in errores if e is not lideres[0])
+
+
+def test_hit_de_single_flight_no_toma_el_lock(monkeypatch):
+    key = dashboard._cache_key()
+    dashboard._indice_candidatos_cached(key)
+    contado = _LockContado()
+    monkeypatch.setattr(dashboard, "_VUELOS_LOCK", contado)
+    for _ in range(10):
+        dashboard._indice_candidatos_cached(key)
+    assert contado.usos == 0
+
+
+def test_miss_de_single_flight_se_comparte():
+    llamadas = []
+
+    @dashboard.single_flight
+    def calcular(x):
+        llamadas.append(x)
+        time.sleep(0.2)
+        return x * 2
+
+    resultados, _ = _en_paralelo(5, lambda: calcular(21))
+    assert resultados == [42] * 5 and llamadas == [21]
+    assert calcular(21) == 42 and llamadas == [21]
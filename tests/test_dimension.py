@@ -0,0 +1,14 @@
+import app as dashboard
+
+
+def test_dimension_igual_a_la_moda():
+    """Espectro canónico = mode().iat[0] sobre ambas hojas (lo que se calculaba por request)."""
+    df, prom = dashboard.load_all(), dashboard.load_promedios()
+    pares = dashboard.pd.concat([
+        df[[dashboard.COL_CANDIDATO, dashboard.COL_ESPECTRO]].set_axis(["c", "e"], axis=1).astype(object),
+        prom[[dashboard.PROM_COL_CANDIDATO, dashboard.PROM_COL_ESPECTRO]].set_axis(["c", "e"], axis=1).astype(object),
+    ])
+    dim = dashboard.load_candidatos()
+    for nombre, grupo in pares.dropna(subset=["c"]).groupby("c"):
+        moda = grupo["e"].mode()
+        assert dim.at[nombre, "espectro"] == (moda.iat[0] if len(moda) else None)
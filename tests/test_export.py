@@ -0,0 +1,72 @@
+import io
+import json
+
+import pandas as pd
+import pytest
+
+import app as dashboard
+
+
+@pytest.fixture(autouse=True)
+def _bloques_chicos(monkeypatch):
+    monkeypatch.setattr(dashboard, "EXPORT_CHUNK_ROWS", 37)  # varios bloques con el Excel de ejemplo
+
+
+def _get(client, url):
+    # El slot de admisión de un export se suelta al cerrar la respuesta (como hace el servidor WSGI)
+    with client.get(url) as r:
+        return r.status_code, r.mimetype, r.headers, r.get_data()
+
+
+def _esperado(**params):
+    with dashboard.app.test_request_context("/api/export", query_string=params):
+        return dashboard._export_frame(params.get("fuente", "semanal"))
+
+
+def test_csv_un_solo_encabezado(client):
+    status, mimetype, headers, body = _get(client, "/api/export?formato=csv&espectro=Centro")
+    assert status == 200 and mimetype == "text/csv"
+    assert headers["Content-Disposition"] == 'attachment; filename="export_semanal.csv"'
+    texto = body.decode("utf-8")
+    esperado = _esperado(espectro="Centro")
+    assert texto.count(texto.splitlines()[0]) == 1
+    leido = pd.read_csv(io.StringIO(texto))
+    assert len(leido) == len(esperado) and list(leido.columns) == list(map(str, esperado.columns))
+
+
+def test_csv_sin_filas_solo_encabezado(client):
+    texto = _get(client, "/api/export?formato=csv&candidato=nadie")[3].decode("utf-8")
+    assert len(texto.splitlines()) == 1
+
+
+@pytest.mark.parametrize("fuente,columnas", [
+    ("heatmap", [dashboard.COL_CANDIDATO, dashboard.COL_RED, "valor"]),
+    ("heatmap-semanal", [dashboard.COL_CANDIDATO, "Semana", "valor"]),
+])
+def test_heatmaps_sin_datos_solo_encabezado(client, monkeypatch, fuente, columnas):
+    monkeypatch.setattr(dashboard, "load_all", lambda: pd.DataFrame())
+    status, _, _, body = _get(client, f"/api/export?formato=csv&fuente={fuente}")
+    assert status == 200
+    assert body.decode("utf-8").splitlines() == [",".join(columnas)]
+
+
+def test_ndjson(client):
+    body = _get(client, "/api/export?formato=ndjson&fuente=heatmap")[3]
+    filas = [json.loads(l) for l in body.decode("utf-8").splitlines()]
+    esperado = _esperado(fuente="heatmap")
+    assert len(filas) == len(esperado)
+    assert filas[0]["valor"] == pytest.approx(esperado["valor"].iloc[0])
+
+
+def test_parquet(client):
+    pytest.importorskip("pyarrow")
+    status, _, _, body = _get(client, "/api/export?formato=parquet&fuente=promedios")
+    assert status == 200
+    leido = pd.read_parquet(io.BytesIO(body))
+    esperado = _esperado(fuente="promedios").reset_index(drop=True)
+    pd.testing.assert_frame_equal(leido, esperado, check_dtype=False, check_categorical=False)
+
+
+@pytest.mark.parametrize("query", ["formato=xml", "fuente=otra"])
+def test_parametros_invalidos(client, query):
+    assert _get(client, "/api/export?" + query)[0] == 400
@@ -0,0 +1,42 @@
+import os
+import sqlite3
+
+import pandas as pd
+import pytest
+
+import app as dashboard
+
+
+def _sin_cache(fn):
+    return fn.__wrapped__.__wrapped__  # single_flight -> lru_cache -> función
+
+
+@pytest.fixture(scope="module")
+def hojas():
+    with pd.ExcelFile(dashboard.EXCEL_PATH) as xls:
+        return {sh: pd.read_excel(xls, sheet_name=sh) for sh in xls.sheet_names}
+
+
+def _comparar(kind, path):
+    excel = ("excel", os.path.abspath(dashboard.EXCEL_PATH))
+    for fn in (dashboard._load_all_cached, dashboard._load_promedios_cached):
+        a = _sin_cache(fn)(excel)
+        b = _sin_cache(fn)((kind, path))
+        pd.testing.assert_frame_equal(a.reset_index(drop=True), b.reset_index(drop=True),
+                                      check_dtype=False, check_categorical=False)
+
+
+def test_sqlite_con_caracteres_especiales_en_la_ruta(tmp_path, hojas):
+    carpeta = tmp_path / "datos ?#%20"
+    carpeta.mkdir()
+    db = str(carpeta / "monitoreo.db")
+    with sqlite3.connect(db) as con:
+        for sh, df in hojas.items():
+            df.to_sql(sh, con, index=False)
+    _comparar("sqlite", db)
+
+
+def test_carpeta_csv(tmp_path, hojas):
+    for sh, df in hojas.items():
+        df.to_csv(tmp_path / f"{sh}.csv", index=False)
+    _comparar("dir", str(tmp_path))
@@ -0,0 +1,141 @@
+import json
+import os
+import sqlite3
+from contextlib import closing
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import app as dashboard
+
+TOKEN = "secreto-de-prueba"
+
+
+@pytest.fixture
+def ingesta(tmp_path, monkeypatch):
+    monkeypatch.setattr(dashboard, "INGEST_TOKEN", TOKEN)
+    monkeypatch.setattr(dashboard, "_INGESTA", dashboard._Ingesta(str(tmp_path / "ingesta.jsonl")))
+    return dashboard._INGESTA
+
+
+def _post(client, filas, token=TOKEN, semana="S99"):
+    return client.post(f"/api/ingesta?semana={semana}", json=filas,
+                       headers={"Authorization": f"Bearer {token}"})
+
+
+def _fila(candidato, red="Instagram", espectro="Centro", tema="Salud pública", likes=10.0, max_likes=50.0):
+    return {dashboard.COL_CANDIDATO: candidato, dashboard.COL_RED: red, dashboard.COL_ESPECTRO: espectro,
+            dashboard.COL_TEMA: tema, dashboard.COL_LIKES: likes, dashboard.COL_COMENT: 1.0,
+            dashboard.COL_MAXLIKES: max_likes}
+
+
+def _sin_cache(fn):
+    return fn.__wrapped__.__wrapped__.__wrapped__  # single_flight -> lru_cache -> incremental -> función
+
+
+def test_token_no_ascii_es_401(client, ingesta):
+    r = _post(client, [_fila("X")], token="contraseña")
+    assert r.status_code == 401
+    assert r.get_json()["error"]
+
+
+def test_token_incorrecto_y_correcto(client, ingesta):
+    assert _post(client, [_fila("X")], token="otro").status_code == 401
+    assert _post(client, [_fila("X")]).status_code == 200
+
+
+def test_dedup_solo_del_lote_y_ids_estables(client, ingesta):
+    antes = dashboard.load_all()
+    existente = antes.iloc[0]
+    repetida = _fila(existente[dashboard.COL_CANDIDATO], red=existente[dashboard.COL_RED],
+                     tema=existente[dashboard.COL_TEMA])
+    nuevas = [_fila("Candidata Nueva", likes=1.0), _fila("Candidata Nueva", likes=2.0), repetida]
+    r = _post(client, nuevas, semana=existente["Semana"])
+    assert r.get_json()["agregadas"] == 1
+
+    despues = dashboard.load_all()
+    assert len(despues) == len(antes) + 1
+    # Las filas previas conservan su id y sus valores; la nueva va a continuación
+    pd.testing.assert_frame_equal(despues.loc[antes.index].reset_index(drop=True),
+                                  antes.reset_index(drop=True), check_categorical=False)
+    assert despues.index[-1] == antes.index.max() + 1
+    assert despues.iloc[-1][dashboard.COL_LIKES] == 1.0  # gana la primera aparición
+
+    # Un lote solo con duplicados no agrega nada
+    assert _post(client, nuevas, semana=existente["Semana"]).get_json()["agregadas"] == 0
+
+
+def test_estructuras_incrementales_iguales_a_reconstruir(client, ingesta):
+    dashboard.build_snapshot()
+    existente = dashboard.load_all().iloc[0][dashboard.COL_CANDIDATO]
+    assert _post(client, [_fila("Zoila Nueva", tema="salud y empleo", max_likes=1e9),
+                          _fila(existente, red="TikTok", espectro="Derecha", tema="tema inédito")]).status_code == 200
+    key = dashboard._cache_key()
+
+    dim, completa = dashboard.load_candidatos(), _sin_cache(dashboard._load_candidatos_cached)(key)[0]
+    pd.testing.assert_frame_equal(dim, completa)
+    assert "Zoila Nueva" in dim.index and "TikTok" in dim.loc[existente, "redes"]
+
+    assert dashboard._indice_candidatos_cached(key) == _sin_cache(dashboard._indice_candidatos_cached)(key)
+    assert dashboard.buscar_candidatos("zoila") == ["Zoila Nueva"]
+
+    vocab, listas, temas, claves = dashboard._indice_temas_cached(key)
+    f_vocab, f_listas, f_temas, f_claves = _sin_cache(dashboard._indice_temas_cached)(key)
+    assert vocab == f_vocab and claves == f_claves
+    assert all(np.array_equal(a, b) for a, b in zip(listas, f_listas))
+    assert temas.keys() == f_temas.keys()
+    assert all(np.array_equal(temas[t], f_temas[t]) for t in temas)
+
+    top = dashboard._top_publicaciones_cached(key)
+    assert top == _sin_cache(dashboard._top_publicaciones_cached)(key)
+    assert top[("S99", "Centro")][0] == (-1e9, dashboard.load_all().index[-2])
+
+    assert dashboard._huellas_cached(key) == _sin_cache(dashboard._huellas_cached)(key)
+
+    consulta = "SELECT * FROM semanal ORDER BY fila"
+    with closing(sqlite3.connect(dashboard._sql_db_cached(key))) as a, \
+            closing(sqlite3.connect(_sin_cache(dashboard._sql_db_cached)(key))) as b:
+        assert a.execute(consulta).fetchall() == b.execute(consulta).fetchall()
+
+
+def test_lote_solo_con_likes(client, ingesta):
+    fila = _fila("Solo Likes", likes=7.0)
+    del fila[dashboard.COL_COMENT]
+    r = _post(client, [fila])
+    assert r.status_code == 200 and r.get_json()["agregadas"] == 1
+    nueva = dashboard.load_all().iloc[-1]
+    assert nueva[dashboard.COL_CANDIDATO] == "Solo Likes" and nueva["Interacciones"] == 7.0
+    assert client.get("/api/heatmap").status_code == 200
+
+
+def test_lote_no_aplicable_no_se_persiste(client, ingesta, monkeypatch):
+    def falla(*_):
+        raise ValueError("dtype incompatible")
+    monkeypatch.setattr(dashboard._Ingesta, "_preparar", falla)
+    r = _post(client, [_fila("Candidata Rota")])
+    assert r.status_code == 400 and "Lote no aplicable" in r.get_json()["error"]
+    assert not os.path.exists(ingesta.path)
+
+
+def test_reproducir_store_omite_lotes_invalidos(tmp_path, monkeypatch):
+    path = tmp_path / "ingesta.jsonl"
+    buena = _fila("Reproducida Ok")
+    path.write_text("\n".join([
+        json.dumps({"ts": 0, "semana": "S98", "filas": [buena]}),
+        json.dumps({"ts": 1, "semana": "S98", "filas": [{dashboard.COL_CANDIDATO: "Rota",
+                                                                    dashboard.COL_RED: "X", "Semana": "S1"}]}),
+    ]) + "\n", encoding="utf-8")
+    store = dashboard._Ingesta(str(path))
+    store.sync()
+    original = dashboard._Ingesta._preparar
+
+    def falla_con_rota(self, df, lote, vistas):
+        if "Rota" in set(lote[dashboard.COL_CANDIDATO]):
+            raise KeyError("columna")
+        return original(self, df, lote, vistas)
+    monkeypatch.setattr(dashboard._Ingesta, "_preparar", falla_con_rota)
+    base = dashboard._load_all_cached(dashboard._source_key())
+    df = store.frame(base)
+    assert len(df) == len(base) + 1 and df.iloc[-1][dashboard.COL_CANDIDATO] == "Reproducida Ok"
+    assert len(store.lotes) == 1
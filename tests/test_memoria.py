@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+
+import app as dashboard
+
+
+def test_reporte_requiere_token(client, monkeypatch):
+    monkeypatch.setattr(dashboard, "ADMIN_TOKEN", "")
+    assert client.get("/api/admin/memoria").status_code == 404
+    monkeypatch.setattr(dashboard, "ADMIN_TOKEN", "admin")
+    assert client.get("/api/admin/memoria").status_code == 401
+    assert client.get("/api/admin/memoria", headers={"Authorization": "Bearer otro"}).status_code == 401
+    assert client.get("/api/admin/memoria", headers={"Authorization": "Bearer ñandú"}).status_code == 401
+
+
+def test_reporte(client, monkeypatch):
+    monkeypatch.setattr(dashboard, "ADMIN_TOKEN", "admin")
+    r = client.get("/api/admin/memoria", headers={"Authorization": "Bearer admin"}).get_json()
+    semanal = r["frames"]["semanal"]
+    assert semanal["filas"] == len(dashboard.load_all())
+    assert semanal["bytes"] == sum(c["bytes"] for c in semanal["columnas"].values()) + \
+        int(dashboard.load_all().index.memory_usage(deep=True))
+    assert r["total_bytes"] == sum(f["bytes"] for f in r["frames"].values() if f)
+
+
+def test_compactar_sin_perder_valores():
+    df = pd.DataFrame({
+        "rep": ["a", "b", "a", "a"],
+        "unico": ["w", "x", "y", "z"],
+        "exacto": [1.0, 2.5, np.nan, 4.0],
+        "inexacto": [0.1, 0.2, 0.3, 0.4],
+    })
+    out = dashboard._compactar(df, ["rep", "unico", "exacto", "inexacto", "falta"])
+    assert list(out.columns) == ["rep", "unico", "exacto", "inexacto"]
+    assert isinstance(out["rep"].dtype, pd.CategoricalDtype) and out["unico"].dtype == object
+    assert out["exacto"].dtype == np.float32 and out["inexacto"].dtype == np.float64
+    pd.testing.assert_frame_equal(out.astype({"rep": object, "exacto": float}), df)
@@ -0,0 +1,91 @@
+import itertools
+import sqlite3
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import app as dashboard
+
+RUTAS = ["/api/ganador-semanal", "/api/ganador-semanal-series", "/api/heatmap", "/api/heatmap-semanal",
+         "/api/variacion-semanal", "/api/ganador-variacion", "/api/ganador-variacion-series"]
+QUERIES = ["", "red=X,Instagram", "espectro=Centro,derecha", "semana=Semana 2,Semana 3", "mes=Octubre",
+           "metric=likes&espectro=Derecha", "metric=comentarios&red=tiktok&mes=sep", "top=3", "limit=4&offset=2",
+           "espectro=none", "red=zz"]
+
+
+def _respuestas(client, monkeypatch, motor):
+    monkeypatch.setattr(dashboard, "QUERY_ENGINE", motor)
+    monkeypatch.setattr(dashboard, "RESPONSE_CACHE_SIZE", 0)
+    return {f"{r}?{q}": client.get(f"{r}?{q}").get_json() for r, q in itertools.product(RUTAS, QUERIES)}
+
+
+def test_paridad_pandas_sqlite(client, monkeypatch):
+    pandas = _respuestas(client, monkeypatch, "pandas")
+    sqlite = _respuestas(client, monkeypatch, "sqlite")
+    distintas = [k for k in pandas if pandas[k] != sqlite[k]]
+    assert distintas == []
+
+
+def test_conexion_por_hilo_sin_lock_global(client, monkeypatch):
+    monkeypatch.setattr(dashboard, "QUERY_ENGINE", "sqlite")
+    monkeypatch.setattr(dashboard, "RESPONSE_CACHE_SIZE", 0)
+    esperado = client.get("/api/heatmap-semanal?metric=likes").get_json()
+    conexiones, resultados, errores = [], [], []
+
+    def trabajo():
+        try:
+            with dashboard.app.test_request_context("/"):
+                conexiones.append(dashboard._sql_conexion())  # se guarda el objeto: ids únicos
+            for _ in range(5):
+                resultados.append(dashboard.app.test_client().get("/api/heatmap-semanal?metric=likes").get_json())
+        except Exception as e:  # pragma: no cover - se reporta abajo
+            errores.append(e)
+
+    hilos = [threading.Thread(target=trabajo) for _ in range(6)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    assert errores == []
+    assert len({id(c) for c in conexiones}) == 6
+    assert all(r == esperado for r in resultados)
+
+
+def test_suma_kahan_igual_a_mean_de_pandas():
+    rng = np.random.default_rng(0)
+    valores = rng.standard_normal(5000) * 10.0 ** rng.integers(-3, 12, 5000)
+    valores[rng.random(5000) < 0.05] = np.nan
+    grupos = rng.integers(0, 50, 5000)
+    esperado = pd.DataFrame({"g": grupos, "v": valores}).groupby("g")["v"].mean().to_numpy()
+
+    con = sqlite3.connect(":memory:")
+    con.create_aggregate("suma_kahan", 2, dashboard._SumaKahan)
+    con.execute("CREATE TABLE t (fila, g, v)")
+    # Insertadas en otro orden: el agregado ordena por fila, como recorre pandas
+    filas = [(i, int(g), None if np.isnan(v) else float(v)) for i, (g, v) in enumerate(zip(grupos, valores))]
+    con.executemany("INSERT INTO t VALUES (?, ?, ?)", filas[::-1])
+    obtenido = [s / n for s, n in con.execute("SELECT suma_kahan(fila, v), COUNT(v) FROM t GROUP BY g ORDER BY g")]
+    assert obtenido == esperado.tolist()
+
+
+def test_base_sql_es_de_solo_lectura():
+    with dashboard.app.test_request_context("/"):
+        con = dashboard._sql_conexion()
+    with pytest.raises(sqlite3.OperationalError):
+        con.execute("DELETE FROM semanal")
+
+
+def test_archivo_nuevo_no_borra_los_de_otro_proceso(monkeypatch):
+    ajeno = (-1, "/tmp/no-existe-de-otro-worker.db")
+    monkeypatch.setattr(dashboard, "_SQL_ARCHIVOS", [ajeno])
+    borrados = []
+    monkeypatch.setattr(dashboard, "_borrar_archivo", borrados.append)
+    try:
+        rutas = [dashboard._sql_archivo_nuevo() for _ in range(3)]
+        assert borrados == rutas[:1]
+        assert dashboard._SQL_ARCHIVOS == [ajeno] + [(dashboard.os.getpid(), r) for r in rutas[1:]]
+    finally:
+        for r in rutas:
+            dashboard.os.remove(r)
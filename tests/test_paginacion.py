@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+import app as dashboard
+
+
+def test_rank_page_empates_estables_entre_paginas():
+    valores = np.array([5, 7, 7, 7, 1, np.nan, 7, 3, 7], dtype=float)
+    completo = dashboard._rank_page(valores, 0, len(valores)).tolist()
+    assert completo == [1, 2, 3, 6, 8, 0, 7, 4, 5]
+    paginas = [dashboard._rank_page(valores, off, 2).tolist() for off in range(0, len(valores), 2)]
+    assert sum(paginas, []) == completo
+
+
+@pytest.mark.parametrize("ruta", ["/api/heatmap", "/api/heatmap-semanal?metric=likes"])
+def test_heatmap_paginas_se_pueden_unir(client, ruta):
+    sep = "&" if "?" in ruta else "?"
+    todo = client.get(ruta).get_json()
+    total = len(todo["rows"])
+    filas = []
+    for off in range(0, total, 4):
+        r = client.get(f"{ruta}{sep}limit=4&offset={off}")
+        pagina = r.get_json()
+        assert r.headers["X-Total-Count"] == str(total)
+        assert pagina["total"] == total
+        assert pagina["cols"] == todo["cols"]
+        filas += pagina["rows"]
+    assert filas == todo["rows"]
+
+
+def test_heatmap_sin_paginar_en_orden_de_ranking(client):
+    hm = client.get("/api/heatmap").get_json()
+    medias = dashboard.load_all().groupby(dashboard.COL_CANDIDATO, observed=True)["Interacciones"].mean()
+    esperado = medias.index[np.argsort(-medias.fillna(-np.inf).to_numpy(), kind="stable")].tolist()
+    assert hm["rows"] == esperado
+    assert client.get("/api/heatmap?top=5").get_json()["rows"] == esperado[:5]
+
+
+@pytest.mark.parametrize("ruta", ["/api/likes-por-candidato", "/api/comentarios-por-candidato", "/api/candidatos-todos"])
+def test_top_y_offset_son_cortes_del_ranking_completo(client, ruta):
+    todo = client.get(ruta).get_json()
+    top = client.get(ruta + "?top=5")
+    assert top.get_json() == todo[:5]
+    assert top.headers["X-Total-Count"] == str(len(todo))
+    assert client.get(ruta + "?limit=3&offset=4").get_json() == todo[4:7]
@@ -0,0 +1,62 @@
+import os
+import subprocess
+import sys
+import threading
+
+import pandas as pd
+import pytest
+
+import app as dashboard
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _sin_cache(fn):
+    return fn.__wrapped__.__wrapped__  # single_flight -> lru_cache -> función
+
+
+def test_paralelo_igual_a_secuencial(monkeypatch):
+    key = dashboard._source_key()
+    monkeypatch.setattr(dashboard, "PARSE_WORKERS", 0)
+    semanal, promedios = _sin_cache(dashboard._load_all_cached)(key), _sin_cache(dashboard._load_promedios_cached)(key)
+    monkeypatch.setattr(dashboard, "PARSE_WORKERS", 2)
+    if not dashboard._parseo_paralelo():
+        pytest.skip("sin fork o con otros hilos vivos en este proceso")
+    p_semanal, p_promedios = _sin_cache(dashboard._parseo_paralelo_cached)(key)
+    pd.testing.assert_frame_equal(p_semanal, semanal)
+    pd.testing.assert_frame_equal(p_promedios, promedios)
+
+
+def test_fuera_del_hilo_principal_es_secuencial(monkeypatch):
+    monkeypatch.setattr(dashboard, "PARSE_WORKERS", 4)
+    visto = []
+    hilo = threading.Thread(target=lambda: visto.append(dashboard._parseo_paralelo()))
+    hilo.start()
+    hilo.join()
+    assert visto == [False]
+
+
+def test_con_otros_hilos_vivos_es_secuencial(monkeypatch):
+    monkeypatch.setattr(dashboard, "PARSE_WORKERS", 4)
+    fin = threading.Event()
+    hilo = threading.Thread(target=fin.wait)
+    hilo.start()
+    try:
+        assert not dashboard._parseo_paralelo()
+    finally:
+        fin.set()
+        hilo.join()
+
+
+def test_preload_con_pool_no_se_bloquea_en_el_import():
+    """El pool corre durante el import de app (--preload): los hijos no deben necesitar importarlo."""
+    env = {k: v for k, v in os.environ.items() if k not in {"WARMUP", "DATA_SOURCE"}}
+    codigo = ("import app; "
+              "print(app._parseo_paralelo_cached.__wrapped__.cache_info().currsize, app._huellas()['version'])")
+    salidas = []
+    for workers in ("2", "0"):
+        out = subprocess.run([sys.executable, "-c", codigo], cwd=RAIZ, capture_output=True, text=True, timeout=120,
+                             env=dict(env, PARSE_WORKERS=workers, PRELOAD_SNAPSHOT="1"), check=True)
+        salidas.append(out.stdout.split())
+    assert salidas[0][0] == "1" and salidas[1][0] == "0"  # con PARSE_WORKERS=2 se usó el pool
+    assert salidas[0][1] == salidas[1][1]  # mismo contenido que la carga secuencial
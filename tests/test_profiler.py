@@ -0,0 +1,47 @@
+import app as dashboard
+
+
+def test_token_no_ascii_no_rompe(client, monkeypatch):
+    monkeypatch.setattr(dashboard, "PROFILE_SECRET", "s3creto")
+    with dashboard.app.test_request_context("/health?_profile=ñ"):
+        assert dashboard._profile_forced() is False
+    with dashboard.app.test_request_context("/health", headers={"X-Profile-Token": "1.ñ"}):
+        assert dashboard._profile_forced() is False
+    assert client.get("/api/heatmap?_profile=ñ").status_code == 200
+
+
+def test_firma_cubre_ruta_y_expiracion(monkeypatch):
+    monkeypatch.setattr(dashboard, "PROFILE_SECRET", "s3creto")
+    token = dashboard.firmar_perfil("/api/heatmap", ttl_s=60)
+    with dashboard.app.test_request_context("/api/heatmap?_profile=" + token):
+        assert dashboard._profile_forced() is True
+    with dashboard.app.test_request_context("/api/temas?_profile=" + token):
+        assert dashboard._profile_forced() is False
+    vencido = dashboard.firmar_perfil("/api/heatmap", ttl_s=-1)
+    with dashboard.app.test_request_context("/api/heatmap?_profile=" + vencido):
+        assert dashboard._profile_forced() is False
+    expira, _, firma = token.partition(".")
+    alterado = f"{int(expira) + 3600}.{firma}"
+    with dashboard.app.test_request_context("/api/heatmap?_profile=" + alterado):
+        assert dashboard._profile_forced() is False
+
+
+def test_solo_una_fraccion_se_muestrea(client, monkeypatch):
+    registrados = []
+    sampler = dashboard._SamplingProfiler(0.001)
+    monkeypatch.setattr(sampler, "start", lambda tid: registrados.append(tid))
+    monkeypatch.setattr(dashboard, "_SAMPLER", sampler)
+    monkeypatch.setattr(dashboard, "PROFILE_SAMPLE_RATE", 0.0)
+    for _ in range(5):
+        client.get("/health")
+    assert registrados == []
+    monkeypatch.setattr(dashboard, "PROFILE_SAMPLE_RATE", 1.0)
+    client.get("/health")
+    assert len(registrados) == 1
+
+
+def test_parametro_profile_sin_firma_no_salta_la_cache(client):
+    client.get("/api/heatmap")
+    antes = len(dashboard._RESPONSE_CACHE)
+    assert client.get("/api/heatmap?_profile=x").status_code == 200
+    assert len(dashboard._RESPONSE_CACHE) == antes + 1
@@ -0,0 +1,59 @@
+import json
+
+import pytest
+
+import app as dashboard
+
+
+def _sin_cache(fn):
+    return fn.__wrapped__.__wrapped__.__wrapped__  # single_flight -> lru_cache -> incremental -> función
+
+
+@pytest.fixture
+def temas_path(tmp_path, monkeypatch):
+    def usar(contenido):
+        path = tmp_path / "temas.json"
+        path.write_text(contenido, encoding="utf-8")
+        monkeypatch.setattr(dashboard, "TEMAS_PATH", str(path))
+        dashboard._temas_dict.cache_clear()
+    yield usar
+    dashboard._temas_dict.cache_clear()
+
+
+def test_diccionario_por_defecto_desde_temas_json():
+    with open(dashboard.TEMAS_PATH, encoding="utf-8") as fh:
+        assert dashboard._temas_dict() == json.load(fh)
+    temas = dashboard._indice_temas_cached(dashboard._cache_key())[2]
+    assert set(temas) == set(dashboard._temas_dict()) | {dashboard.TEMA_OTROS}
+
+
+def test_diccionario_configurable(temas_path):
+    temas_path(json.dumps({"Salud pública": ["salud", "hospital"]}))
+    vocab, listas, temas, claves = _sin_cache(dashboard._indice_temas_cached)(dashboard._cache_key())
+    assert set(temas) == {"Salud pública", dashboard.TEMA_OTROS}
+    df = dashboard.load_all()
+    for fila in temas["Salud pública"]:
+        assert "salud" in dashboard._sin_acentos(df.at[fila, dashboard.COL_TEMA]) or \
+               "hospital" in dashboard._sin_acentos(df.at[fila, dashboard.COL_TEMA])
+    con_tema = df[dashboard.COL_TEMA].map(dashboard._valid_str).sum()
+    assert len(temas["Salud pública"]) + len(temas[dashboard.TEMA_OTROS]) == con_tema
+
+
+def test_diccionario_invalido_deja_todo_en_otros(temas_path):
+    temas_path("no es json")
+    temas = _sin_cache(dashboard._indice_temas_cached)(dashboard._cache_key())[2]
+    assert list(temas) == [dashboard.TEMA_OTROS]
+    assert len(temas[dashboard.TEMA_OTROS]) == dashboard.load_all()[dashboard.COL_TEMA].map(dashboard._valid_str).sum()
+
+
+def test_filtro_de_tema_en_paneles_semanales(client):
+    tema = next(t for t, filas in dashboard._indice_temas_cached(dashboard._cache_key())[2].items() if len(filas))
+    todos = client.get("/api/heatmap-semanal").get_json()
+    filtrado = client.get("/api/heatmap-semanal", query_string={"tema": tema}).get_json()
+    assert filtrado != todos
+
+
+def test_barras_no_dependen_del_tema(client):
+    assert "tema" not in dashboard.FILTER_PARAMS
+    for ruta in ("/api/likes-por-candidato", "/api/comentarios-por-candidato", "/api/candidatos-todos"):
+        assert client.get(ruta, query_string={"tema": "Salud"}).get_json() == client.get(ruta).get_json()
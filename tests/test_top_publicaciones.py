@@ -0,0 +1,48 @@
+import pytest
+
+import app as dashboard
+
+
+def _esperado(df, por, k):
+    """Fuerza bruta: orden total por likes desc., empate -> id de fila menor."""
+    df = df[df[dashboard.COL_MAXLIKES].notna()]
+    df = df.assign(_id=df.index).sort_values([dashboard.COL_MAXLIKES, "_id"], ascending=[False, True])
+    col = dashboard.LEADERBOARD_POR.get(por)
+    grupos = {None: df} if col is None else {
+        (None if dashboard.pd.isna(g) else g): sub for g, sub in df.groupby(df[col].astype(object), dropna=False)}
+    return {g: [(c, r, s, dashboard._r1(v)) for c, r, s, v in
+                zip(sub[dashboard.COL_CANDIDATO], sub[dashboard.COL_RED], sub["Semana"], sub[dashboard.COL_MAXLIKES])][:k]
+            for g, sub in grupos.items()}
+
+
+def _obtenido(client, **params):
+    r = client.get("/api/top-publicaciones", query_string=params)
+    assert r.status_code == 200
+    return {g["grupo"]: [(p["candidato"], p["red"], p["semana"], p["likes"]) for p in g["publicaciones"]]
+            for g in r.get_json()["grupos"]}
+
+
+@pytest.mark.parametrize("por", [None, "semana", "espectro"])
+def test_precalculado_igual_a_fuerza_bruta(client, por):
+    params = {"k": 7} if por is None else {"k": 7, "por": por}
+    assert _obtenido(client, **params) == _esperado(dashboard.load_all(), por, 7)
+
+
+@pytest.mark.parametrize("por", [None, "espectro"])
+def test_filtrado_igual_a_fuerza_bruta(client, por):
+    params = {"k": 4, "red": "x"} if por is None else {"k": 4, "red": "x", "por": por}
+    df = dashboard.load_all()
+    df = df[df[dashboard.COL_RED].astype(str).str.lower() == "x"]
+    assert _obtenido(client, **params) == _esperado(df, por, 4)
+
+
+def test_filtro_de_semana_por_la_ruta_rapida(client):
+    semana = dashboard.load_all()["Semana"].iloc[0]
+    df = dashboard.load_all()
+    assert _obtenido(client, k=3, semana=semana) == _esperado(df[df["Semana"] == semana], None, 3)
+
+
+def test_k_acotado_y_por_invalido(client):
+    r = client.get("/api/top-publicaciones", query_string={"k": 10_000}).get_json()
+    assert r["k"] == dashboard.LEADERBOARD_K_MAX
+    assert client.get("/api/top-publicaciones?por=red").status_code == 400
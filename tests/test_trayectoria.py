@@ -0,0 +1,35 @@
+import numpy as np
+
+
+def test_metrica_desconocida_400(client):
+    r = client.get("/api/trayectoria?metric=seguidores")
+    assert r.status_code == 400
+    assert client.get("/api/trayectoria?metric=Likes").status_code == 200
+
+
+def test_acumulado_nulo_antes_del_primer_dato(client):
+    data = client.get("/api/trayectoria?metric=likes").get_json()
+    assert data["metric"] == "likes"
+    vistos = 0
+    for c in data["candidatos"]:
+        primero = next((i for i, v in enumerate(c["valores"]) if v is not None), None)
+        if primero is None:
+            assert all(a is None for a in c["acumulado"])
+            continue
+        assert all(a is None for a in c["acumulado"][:primero])
+        assert all(a is not None for a in c["acumulado"][primero:])
+        vistos += primero > 0
+    assert vistos  # el workbook tiene candidatos que aparecen después de la primera semana
+
+
+def test_trayectoria_coincide_con_heatmap_semanal(client):
+    tray = client.get("/api/trayectoria?metric=comentarios&red=X").get_json()
+    hm = client.get("/api/heatmap-semanal?metric=comentarios&red=X").get_json()
+    celdas = {(v["candidato"], v["semana"]): (None if v["nd"] else v["valor"]) for v in hm["values"]}
+    for c in tray["candidatos"]:
+        for semana, valor in zip(tray["semanas"], c["valores"]):
+            assert celdas.get((c["candidato"], semana)) == valor
+        acum = np.nancumsum([np.nan if v is None else v for v in c["valores"]])
+        for a, esperado in zip(c["acumulado"], acum):
+            if a is not None:
+                assert abs(a - esperado) <= 0.05 * len(tray["semanas"])
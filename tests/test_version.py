@@ -0,0 +1,33 @@
+import os
+import subprocess
+import sys
+import threading
+
+import app as dashboard
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _importar(**env):
+    env = dict({k: v for k, v in os.environ.items() if not k.startswith(("LIVE_", "WEB_", "ADMISSION_"))}, **env)
+    codigo = "import app; print(app.LIVE_MAX_WAITERS, app._CARRIL_GENERAL._initial_value)"
+    out = subprocess.run([sys.executable, "-c", codigo], cwd=RAIZ, env=env, capture_output=True, text=True, check=True)
+    return [int(x) for x in out.stdout.split()]
+
+
+def test_esperas_dimensionadas_contra_los_hilos():
+    assert _importar() == [2, 6]
+    assert _importar(WEB_THREADS="16") == [6, 14]
+    assert _importar(WEB_THREADS="4") == [1, 2]
+    assert _importar(LIVE_MAX_WAITERS="3") == [3, 6]
+
+
+def test_sin_espera_devuelve_la_version_nueva_al_instante(client, monkeypatch):
+    monkeypatch.setattr(dashboard, "_LIVE_WAITERS", threading.BoundedSemaphore(1))
+    dashboard._LIVE_WAITERS.acquire()  # todos los huecos de espera ocupados
+    actual = client.get("/api/version").get_json()
+    r = client.get("/api/version?v=vieja&espera=1").get_json()
+    assert r["version"] == actual["version"] and "reintentar" not in r
+    r = client.get(f"/api/version?v={actual['version']}&espera=1").get_json()
+    assert r["reintentar"] == dashboard.LIVE_RETRY_S
+
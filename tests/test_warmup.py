@@ -0,0 +1,27 @@
+import os
+import subprocess
+import sys
+
+import app as dashboard
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_importar_no_arranca_warmup():
+    env = {k: v for k, v in os.environ.items() if k not in {"WARMUP", "PRELOAD_SNAPSHOT"}}
+    codigo = ("import threading, app; "
+              "print(app.WARMUP, app._READY.is_set(), any(t.name == 'warmup' for t in threading.enumerate()))")
+    out = subprocess.run([sys.executable, "-c", codigo], cwd=RAIZ, env=env, capture_output=True, text=True, check=True)
+    assert out.stdout.split() == ["False", "True", "False"]
+
+
+def test_health_y_ready(client):
+    assert client.get("/health").status_code == 200
+    assert client.get("/ready").status_code == 200
+    dashboard._READY.clear()
+    try:
+        r = client.get("/ready")
+        assert r.status_code == 503
+        assert client.get("/health").status_code == 200  # liveness no depende del snapshot
+    finally:
+        dashboard._READY.set()